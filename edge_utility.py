@@ -1,28 +1,53 @@
+import array
 import base64
+import binascii
+import csv
+import functools
+import glob
 import hashlib
+import io
+import itertools
 import json
+import mmap
 import secrets
+import shutil
+import signal
+import sqlite3
+import stat
 import string
+import struct
+import threading
+import unicodedata
 import uuid
-from urllib.parse import quote, unquote
+import zlib
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, quote_from_bytes, quote_plus, unquote, unquote_plus, urlsplit
+from xml.etree import ElementTree
 import qrcode
 from colorama import init, Fore, Style
 import pyperclip
 import os
 import time
-import requests
 import platform
 import socket
 from datetime import datetime
 import random
 import math
+import re
 import sys
+import argparse
 
 # Инициализация colorama
 init(autoreset=True)
 
 # Глобальные настройки
 SETTINGS_FILE = "edge_settings.json"
+HASH_CACHE_FILE = "edge_hash_cache.db"
+CHECKPOINT_DIR = "edge_checkpoints"
+EMOJI_DICT_DIR = "edge_emoji"
+EMOJI_INDEX_DIR = "edge_emoji_index"
 DEFAULT_SETTINGS = {
     "theme": "default",
     "sound": False,
@@ -31,7 +56,10 @@ DEFAULT_SETTINGS = {
     "language": "ru",
     "developer_mode": False,
     "show_tips": True,
-    "log_operations": False
+    "log_operations": False,
+    "hash_cache": True,
+    "hash_cache_max_entries": 100000,
+    "emoji_languages": "ru"
 }
 
 def load_settings():
@@ -120,8 +148,1587 @@ def show_logo():
     print(f"\n{theme['success']} ✓ Система готова к работе!")
     time.sleep(0.5)
 
+def format_size(size):
+    """Размер в человекочитаемом виде"""
+    if size < 1024:
+        return f"{size:.0f} байт"
+    elif size < 1024 * 1024:
+        return f"{size/1024:.2f} KB"
+    elif size < 1024 * 1024 * 1024:
+        return f"{size/1024/1024:.2f} MB"
+    return f"{size/1024/1024/1024:.2f} GB"
+
+# ==================== ПОТОКОВОЕ ХЕШИРОВАНИЕ ====================
+
+# Размер блока чтения: память на файл не зависит от его размера
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Все алгоритмы генератора хешей (имя -> конструктор hashlib)
+HASH_ALGORITHMS = {
+    "MD5": hashlib.md5,
+    "SHA-1": hashlib.sha1,
+    "SHA-256": hashlib.sha256,
+    "SHA-512": hashlib.sha512,
+    "SHA3-256": hashlib.sha3_256,
+    "SHA3-512": hashlib.sha3_512,
+    "BLAKE2b": hashlib.blake2b,
+    "BLAKE2s": hashlib.blake2s
+}
+
+DEFAULT_FILE_ALGORITHMS = ("MD5", "SHA-256")
+
+def parse_algorithms(text, default=DEFAULT_FILE_ALGORITHMS):
+    """Разбор списка алгоритмов: 'md5, sha256', 'all' или пусто"""
+    text = text.strip()
+    if not text:
+        return tuple(default)
+    if text.lower() == 'all':
+        return tuple(HASH_ALGORITHMS)
+
+    lookup = {name.lower().replace('-', ''): name for name in HASH_ALGORITHMS}
+    selected = []
+    for item in text.replace(';', ',').split(','):
+        key = item.strip().lower().replace('-', '')
+        if not key:
+            continue
+        if key not in lookup:
+            raise ValueError(f"Неизвестный алгоритм: {item.strip()}")
+        if lookup[key] not in selected:
+            selected.append(lookup[key])
+    return tuple(selected) or tuple(default)
+
+def print_hash_progress(done, total, elapsed, resumed=0):
+    """Строка прогресса чтения со скоростью (resumed — уже обработано до запуска)"""
+    speed = (done - resumed) / elapsed if elapsed > 0 else 0
+    percent = done * 100 / total if total else 100.0
+    print(f"\r{theme['accent']}Прочитано: {format_size(done)} из {format_size(total)} "
+          f"({percent:5.1f}%) | {format_size(speed)}/s   ", end="")
+
+class TextCounter:
+    """Счётчик строк, слов и символов UTF-8 по блокам байтов.
+
+    Имеет интерфейс update() как у hashlib, поэтому читается в том же проходе,
+    что и хеши, и не держит в памяти ничего, кроме хвоста блока.
+    Считает как str в текстовом режиме open(): CRLF и одиночный CR — один
+    перевод строки, слова разделяет любой пробел Unicode, как у str.split().
+    """
+
+    # Имя итога в HashCache; меняется вместе с правилами подсчёта,
+    # чтобы не брать из кэша числа, посчитанные по старым
+    CACHE_NAME = "text_stats_v2"
+
+    # Байты-продолжения UTF-8 (10xxxxxx) не начинают новый символ
+    _NOT_CONTINUATION = bytes(range(0x80)) + bytes(range(0xC0, 0x100))
+    # Пробелы для str.split(), которых не знает bytes.split(): \x1c-\x1f и
+    # многобайтные (NBSP, U+2000-U+200A, U+3000 и др.)
+    _SEPARATORS = bytes.maketrans(b"\x1c\x1d\x1e\x1f", b"    ")
+    _UNICODE_SPACE_RE = re.compile(rb"\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]"
+                                   rb"|\xe2\x81\x9f|\xe3\x80\x80")
+
+    def __init__(self):
+        self.lines = 0
+        self.words = 0
+        self.chars = 0
+        self._in_word = False
+        self._last = b""
+        # Незавершённый символ UTF-8 в конце блока — для подсчёта слов
+        self._carry = b""
+
+    @staticmethod
+    def _complete_length(data):
+        """Длина data без незавершённого символа UTF-8 в конце"""
+        for back in range(1, min(3, len(data)) + 1):
+            byte = data[-back]
+            if byte & 0xC0 == 0x80:
+                continue
+            if byte >= 0xC0 and back < (2 if byte < 0xE0 else 3 if byte < 0xF0 else 4):
+                return len(data) - back
+            break
+        return len(data)
+
+    def update(self, data):
+        data = bytes(data) if isinstance(data, memoryview) else data
+        if not data:
+            return
+        # \r\n (в том числе разрезанный границей блоков) — один символ и один перевод строки
+        pairs = data.count(b"\r\n") + (self._last == b"\r" and data[:1] == b"\n")
+        self.lines += data.count(b"\n") + data.count(b"\r") - pairs
+        self.chars += len(data) - len(data.translate(None, self._NOT_CONTINUATION)) - pairs
+        self._last = data[-1:]
+
+        if self._carry:
+            data = self._carry + data
+        cut = self._complete_length(data)
+        self._carry = data[cut:]
+        data = data[:cut].translate(self._SEPARATORS)
+        if not data:
+            return
+        if not data.isascii():
+            data = self._UNICODE_SPACE_RE.sub(b" ", data)
+
+        words = len(data.split())
+        # Слово, разрезанное границей блоков, уже посчитано в прошлом блоке
+        if words and self._in_word and not data[:1].isspace():
+            words -= 1
+        self.words += words
+        self._in_word = not data[-1:].isspace()
+
+    def result(self):
+        """Итог как у readlines(): последняя строка без перевода тоже считается"""
+        lines = self.lines + (1 if self._last and self._last not in (b"\n", b"\r") else 0)
+        return {"lines": lines, "words": self.words, "chars": self.chars}
+
+    def load(self, result):
+        """Восстановить итог из кэша"""
+        self.lines = result["lines"]
+        self.words = result["words"]
+        self.chars = result["chars"]
+        self._last = b"\n"
+
+def hash_stream(stream, algorithms=DEFAULT_FILE_ALGORITHMS, progress=None, total=0,
+                chunk_size=HASH_CHUNK_SIZE, extra=()):
+    """Хеширование бинарного потока за один проход всеми выбранными алгоритмами.
+
+    extra — дополнительные потребители с методом update() (например, TextCounter),
+    получающие те же блоки.
+    """
+    hashers = {name: HASH_ALGORITHMS[name]() for name in algorithms}
+    updates = [hasher.update for hasher in hashers.values()]
+    updates += [consumer.update for consumer in extra]
+
+    # Один буфер на всё чтение: readinto не создаёт новых объектов на блок
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    done = 0
+    start = last_report = time.perf_counter()
+
+    while True:
+        size = stream.readinto(buffer)
+        if not size:
+            break
+        chunk = view[:size]
+        for update in updates:
+            update(chunk)
+        done += size
+
+        if progress:
+            now = time.perf_counter()
+            if now - last_report >= 0.25:
+                progress(done, total, now - start)
+                last_report = now
+
+    if progress:
+        progress(done, total, time.perf_counter() - start)
+
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+def hash_file(filepath, algorithms=DEFAULT_FILE_ALGORITHMS, progress=None, extra=()):
+    """Хеширование файла блоками фиксированного размера"""
+    with open(filepath, 'rb', buffering=0) as f:
+        total = os.fstat(f.fileno()).st_size
+        return hash_stream(f, algorithms, progress=progress, total=total, extra=extra)
+
+# ==================== КЭШ ХЕШЕЙ ====================
+
+class HashCache:
+    """Кэш дайджестов в SQLite: запись верна, пока не изменились размер, mtime и inode"""
+
+    def __init__(self, path=HASH_CACHE_FILE, max_entries=100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._touched = set()
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS digests (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            results TEXT NOT NULL,
+            last_used REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS digests_lru ON digests (last_used)")
+        self.db.commit()
+
+    @staticmethod
+    def file_key(filepath):
+        """Ключ актуальности: (абсолютный путь, размер, mtime_ns, inode)"""
+        stats = os.stat(filepath)
+        return os.path.abspath(filepath), stats.st_size, stats.st_mtime_ns, stats.st_ino
+
+    def lookup(self, key, names):
+        """Сохранённые результаты для всех names или None"""
+        path = key[0]
+        pending = self._pending.get(path)
+        if pending is not None and pending[0] == key:
+            results = pending[1]
+        else:
+            row = self.db.execute(
+                "SELECT results FROM digests WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                key).fetchone()
+            results = json.loads(row[0]) if row else {}
+
+        if all(name in results for name in names):
+            self.hits += 1
+            self._touched.add(path)
+            return {name: results[name] for name in names}
+        self.misses += 1
+        return None
+
+    def store(self, key, results):
+        """Запомнить результаты (дописываются к уже известным для той же версии файла)"""
+        path = key[0]
+        known = self._pending.get(path)
+        if known is None or known[0] != key:
+            row = self.db.execute(
+                "SELECT results FROM digests WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                key).fetchone()
+            known = (key, json.loads(row[0]) if row else {})
+        self._pending[path] = (key, {**known[1], **results})
+
+    def flush(self):
+        """Запись накопленных изменений, обновление LRU и вытеснение старых записей"""
+        now = time.time()
+        if self._pending:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, json.dumps(results), now) for key, results in self._pending.values()])
+        if self._touched:
+            self.db.executemany("UPDATE digests SET last_used = ? WHERE path = ?",
+                                [(now, path) for path in self._touched])
+
+        count = self.db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+        if count > self.max_entries:
+            self.db.execute(
+                "DELETE FROM digests WHERE path IN "
+                "(SELECT path FROM digests ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,))
+
+        self.db.commit()
+        self._pending.clear()
+        self._touched.clear()
+
+    def clear(self):
+        """Удалить все записи"""
+        self._pending.clear()
+        self._touched.clear()
+        self.db.execute("DELETE FROM digests")
+        self.db.commit()
+        self.db.execute("VACUUM")
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+_hash_cache = None
+
+def get_hash_cache():
+    """Общий кэш хешей или None, если он выключен в настройках"""
+    global _hash_cache
+    if not SETTINGS["hash_cache"]:
+        return None
+    if _hash_cache is None:
+        try:
+            _hash_cache = HashCache(HASH_CACHE_FILE, SETTINGS["hash_cache_max_entries"])
+        except sqlite3.Error:
+            return None
+    return _hash_cache
+
+def cached_hash_file(filepath, algorithms=DEFAULT_FILE_ALGORITHMS, progress=None, cache=None,
+                     counter=None):
+    """hash_file с проверкой кэша: неизменённый файл не перечитывается.
+
+    Если передан counter (TextCounter), его итог тоже берётся из кэша или
+    считается в том же проходе чтения.
+    """
+    extra = (counter,) if counter is not None else ()
+    if cache is None:
+        return hash_file(filepath, algorithms, progress, extra)
+
+    key = HashCache.file_key(filepath)
+    names = tuple(algorithms) + ((TextCounter.CACHE_NAME,) if counter is not None else ())
+    results = cache.lookup(key, names)
+    if results is None:
+        results = hash_file(filepath, algorithms, progress, extra)
+        if counter is not None:
+            results[TextCounter.CACHE_NAME] = counter.result()
+        cache.store(key, results)
+    elif counter is not None:
+        counter.load(results[TextCounter.CACHE_NAME])
+    cache.flush()
+    return {name: results[name] for name in algorithms}
+
+def print_cache_counters(cache):
+    """Счётчики попаданий/промахов кэша"""
+    if cache is not None:
+        printc(f"Кэш хешей: попаданий {cache.hits:,d}, промахов {cache.misses:,d}", "text")
+
+# ==================== ВОЗОБНОВЛЯЕМОЕ ХЕШИРОВАНИЕ ====================
+
+# Состояние объектов hashlib нельзя сохранить на диск, поэтому большой файл
+# хешируется деревом: каждый сегмент отдельно, корень — хеш списка хешей
+# сегментов. Контрольная точка — смещение и готовые хеши сегментов.
+TREE_SEGMENT_SIZE = 64 * 1024 * 1024
+TREE_ALGORITHM = "BLAKE2b"
+RESUMABLE_MIN_SIZE = 1024 * 1024 * 1024
+
+def tree_hash_name(algorithm=TREE_ALGORITHM, segment_size=TREE_SEGMENT_SIZE):
+    """Имя дайджеста дерева: параметры влияют на результат"""
+    return f"{algorithm}-tree/{segment_size // (1024 * 1024)}MB"
+
+def tree_root(leaves, algorithm=TREE_ALGORITHM):
+    """Корень дерева из hex-хешей сегментов"""
+    return HASH_ALGORITHMS[algorithm](b"".join(bytes.fromhex(leaf) for leaf in leaves)).hexdigest()
+
+def _hash_segment(filepath, index, segment_size, algorithm):
+    """Хеш одного сегмента файла"""
+    hasher = HASH_ALGORITHMS[algorithm]()
+    buffer = bytearray(min(HASH_CHUNK_SIZE, segment_size))
+    view = memoryview(buffer)
+    remaining = segment_size
+    with open(filepath, 'rb', buffering=0) as f:
+        f.seek(index * segment_size)
+        while remaining:
+            size = f.readinto(view[:min(remaining, len(buffer))])
+            if not size:
+                break
+            hasher.update(view[:size])
+            remaining -= size
+    return hasher.hexdigest()
+
+def checkpoint_path(filepath):
+    """Файл контрольной точки в CHECKPOINT_DIR (рядом с настройками)"""
+    name = hashlib.sha1(os.path.abspath(filepath).encode()).hexdigest()
+    return os.path.join(CHECKPOINT_DIR, f"{name}.json")
+
+def load_checkpoint(filepath, algorithm=TREE_ALGORITHM, segment_size=TREE_SEGMENT_SIZE):
+    """Контрольная точка, если файл с тех пор не менялся, иначе None"""
+    try:
+        with open(checkpoint_path(filepath), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    stats = os.stat(filepath)
+    expected = {
+        "path": os.path.abspath(filepath),
+        "size": stats.st_size,
+        "mtime_ns": stats.st_mtime_ns,
+        "algorithm": algorithm,
+        "segment_size": segment_size
+    }
+    if any(checkpoint.get(key) != value for key, value in expected.items()):
+        return None
+    return checkpoint
+
+def save_checkpoint(filepath, leaves, algorithm=TREE_ALGORITHM, segment_size=TREE_SEGMENT_SIZE):
+    """Атомарная запись контрольной точки"""
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    stats = os.stat(filepath)
+    path = checkpoint_path(filepath)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({
+            "path": os.path.abspath(filepath),
+            "size": stats.st_size,
+            "mtime_ns": stats.st_mtime_ns,
+            "algorithm": algorithm,
+            "segment_size": segment_size,
+            "offset": min(len(leaves) * segment_size, stats.st_size),
+            "leaves": leaves
+        }, f)
+    os.replace(path + ".tmp", path)
+
+def remove_checkpoint(filepath):
+    """Удалить контрольную точку после завершения"""
+    try:
+        os.remove(checkpoint_path(filepath))
+    except OSError:
+        pass
+
+def _ignore_sigint():
+    """Инициализатор пула: Ctrl+C обрабатывает только главный процесс"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def tree_hash_file(filepath, algorithm=TREE_ALGORITHM, segment_size=TREE_SEGMENT_SIZE,
+                   progress=None, resume=True, workers=None):
+    """Дерево хешей файла: сегменты хешируются параллельно в пуле процессов.
+
+    Контрольная точка обновляется по мере готовности непрерывного префикса
+    сегментов, поэтому прерванный запуск (в т.ч. Ctrl+C) продолжается с
+    сохранённого смещения. Возвращает описание дерева: корень, хеши сегментов,
+    размер файла, алгоритм и размер сегмента.
+    """
+    total = os.path.getsize(filepath)
+    count = (total + segment_size - 1) // segment_size
+    checkpoint = load_checkpoint(filepath, algorithm, segment_size) if resume else None
+    leaves = list(checkpoint["leaves"]) if checkpoint else []
+    indices = range(len(leaves), count)
+    workers = min(workers or os.cpu_count() or 1, max(1, len(indices)))
+    start = time.perf_counter()
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint)
+        results = executor.map(_hash_segment, [filepath] * len(indices), indices,
+                               [segment_size] * len(indices), [algorithm] * len(indices))
+    else:
+        results = (_hash_segment(filepath, index, segment_size, algorithm) for index in indices)
+
+    try:
+        for leaf in results:
+            leaves.append(leaf)
+            save_checkpoint(filepath, leaves, algorithm, segment_size)
+            if progress:
+                progress(min(len(leaves) * segment_size, total), total, time.perf_counter() - start)
+    except KeyboardInterrupt:
+        save_checkpoint(filepath, leaves, algorithm, segment_size)
+        raise
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    remove_checkpoint(filepath)
+    return {
+        "file": os.path.abspath(filepath),
+        "size": total,
+        "algorithm": algorithm,
+        "segment_size": segment_size,
+        "root": tree_root(leaves, algorithm),
+        "leaves": leaves
+    }
+
+def save_tree_map(map_path, tree):
+    """Карта сегментов (описание дерева) в JSON для последующего сравнения"""
+    with open(map_path, 'w', encoding='utf-8') as f:
+        json.dump(tree, f, indent=1)
+
+def load_tree(path, algorithm=TREE_ALGORITHM, segment_size=TREE_SEGMENT_SIZE, workers=None, progress=None):
+    """Дерево из карты .json или вычисленное по файлу"""
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = json.load(f)
+        if "leaves" not in tree or "segment_size" not in tree:
+            raise ValueError(f"Не карта сегментов: {path}")
+        return tree
+    return tree_hash_file(path, algorithm, segment_size, progress=progress, workers=workers)
+
+def diff_trees(first, second):
+    """Различающиеся области двух деревьев: список (начало, конец) в байтах.
+
+    Соседние различающиеся сегменты объединяются в одну область.
+    """
+    if first["segment_size"] != second["segment_size"] or first["algorithm"] != second["algorithm"]:
+        raise ValueError("Карты построены с разными параметрами — сравнение невозможно")
+
+    segment_size = first["segment_size"]
+    longest = max(first["size"], second["size"])
+    count = max(len(first["leaves"]), len(second["leaves"]))
+    ranges = []
+    for index in range(count):
+        a = first["leaves"][index] if index < len(first["leaves"]) else None
+        b = second["leaves"][index] if index < len(second["leaves"]) else None
+        if a == b:
+            continue
+        begin = index * segment_size
+        end = min(begin + segment_size, longest)
+        if ranges and ranges[-1][1] == begin:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((begin, end))
+    return ranges
+
+def resumable_hash_interactive(filepath, cache=None):
+    """Возобновляемое хеширование для file_info: {имя: корень} или None при прерывании"""
+    name = tree_hash_name()
+    if cache is not None:
+        key = HashCache.file_key(filepath)
+        digests = cache.lookup(key, (name,))
+        if digests:
+            cache.flush()
+            return digests
+
+    total = os.path.getsize(filepath)
+    checkpoint = load_checkpoint(filepath)
+    resumed = 0
+    if checkpoint:
+        printc(f"Найдена контрольная точка: {format_size(checkpoint['offset'])} из {format_size(total)}", "accent")
+        if input(f"{theme['accent']}Продолжить с неё? (y/n): {theme['text']}").lower() == 'y':
+            resumed = checkpoint["offset"]
+        else:
+            remove_checkpoint(filepath)
+
+    printc(f"Ctrl+C прерывает хеширование с сохранением прогресса (процессов: {os.cpu_count() or 1})", "text")
+    try:
+        tree = tree_hash_file(filepath, progress=functools.partial(print_hash_progress, resumed=resumed))
+    except KeyboardInterrupt:
+        checkpoint = load_checkpoint(filepath)
+        print()
+        printc(f"⏸ Прервано. Сохранено: {format_size(checkpoint['offset'] if checkpoint else 0)} "
+               f"из {format_size(total)}, повторный запуск продолжит с этого места", "accent")
+        return None
+    print()
+
+    digests = {name: tree["root"]}
+    if cache is not None:
+        cache.store(key, digests)
+        cache.flush()
+
+    map_path = input(f"{theme['accent']}Сохранить карту сегментов в файл .json (Enter — пропустить): {theme['text']}").strip()
+    if map_path:
+        save_tree_map(map_path, tree)
+        printc(f"✓ Карта сегментов сохранена: {map_path}", "success")
+
+    other = input(f"{theme['accent']}Сравнить с файлом или картой .json (Enter — пропустить): {theme['text']}").strip()
+    if other:
+        second = load_tree(other, progress=print_hash_progress)
+        if not other.lower().endswith('.json'):
+            print()
+        print_tree_diff(tree, second)
+    return digests
+
+def print_tree_diff(first, second):
+    """Вывод различающихся областей двух деревьев"""
+    ranges = diff_trees(first, second)
+    if not ranges:
+        printc("✓ Содержимое совпадает", "success")
+        return
+    differing = sum(end - begin for begin, end in ranges)
+    printc(f"✗ Различается областей: {len(ranges)} ({format_size(differing)})", "error")
+    for begin, end in ranges[:20]:
+        printc(f"    {begin:,d} – {end:,d} байт", "accent")
+    if len(ranges) > 20:
+        printc(f"    ... и ещё {len(ranges) - 20}", "text")
+
+# ==================== ХЕШИРОВАНИЕ ДИРЕКТОРИЙ ====================
+
+# Алгоритм по длине hex-дайджеста для манифестов формата sha256sum
+DIGEST_LENGTHS = {32: "MD5", 40: "SHA-1", 64: "SHA-256", 128: "SHA-512"}
+
+def walk_files(root):
+    """Обход дерева через os.scandir: (путь, размер) для каждого файла"""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+def _hash_file_job(filepath, algorithm):
+    """Задача для пула процессов: (дайджест, ошибка)"""
+    try:
+        return hash_file(filepath, (algorithm,))[algorithm], None
+    except OSError as e:
+        return None, str(e)
+
+def hash_paths(files, algorithm="SHA-256", workers=None, progress=None, cache=None):
+    """Хеширование списка (путь, размер) в пуле процессов.
+
+    Возвращает список (путь, размер, дайджест, ошибка) в исходном порядке.
+    Файлы, найденные в кэше, не читаются.
+    """
+    workers = workers or os.cpu_count() or 1
+    total_bytes = sum(size for _, size in files)
+    known = {}
+    keys = {}
+
+    if cache is not None:
+        for path, _ in files:
+            try:
+                keys[path] = HashCache.file_key(path)
+            except OSError:
+                continue
+            digests = cache.lookup(keys[path], (algorithm,))
+            if digests:
+                known[path] = digests[algorithm]
+
+    pending = [path for path, _ in files if path not in known]
+    done_bytes = sum(size for path, size in files if path in known)
+    hashed = {}
+    start = last_report = time.perf_counter()
+
+    if workers == 1 or len(pending) < 8:
+        outcomes = (_hash_file_job(path, algorithm) for path in pending)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint)
+        chunksize = max(1, min(64, len(pending) // (workers * 8)))
+        outcomes = executor.map(_hash_file_job, pending, [algorithm] * len(pending), chunksize=chunksize)
+
+    sizes = dict(files)
+    try:
+        for path, (digest, error) in zip(pending, outcomes):
+            hashed[path] = (digest, error)
+            if cache is not None and digest and path in keys:
+                cache.store(keys[path], {algorithm: digest})
+            done_bytes += sizes[path]
+            if progress:
+                now = time.perf_counter()
+                if now - last_report >= 0.25:
+                    progress(len(known) + len(hashed), len(files), done_bytes, total_bytes, now - start)
+                    last_report = now
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        if cache is not None:
+            cache.flush()
+
+    if progress:
+        progress(len(files), len(files), done_bytes, total_bytes, time.perf_counter() - start)
+
+    results = []
+    for path, size in files:
+        if path in known:
+            results.append((path, size, known[path], None))
+        else:
+            results.append((path, size, *hashed[path]))
+    return results
+
+def print_directory_progress(files_done, files_total, bytes_done, bytes_total, elapsed):
+    """Строка прогресса с суммарной пропускной способностью"""
+    speed = bytes_done / elapsed if elapsed > 0 else 0
+    rate = files_done / elapsed if elapsed > 0 else 0
+    print(f"\r{theme['accent']}Файлов: {files_done:,d}/{files_total:,d} | "
+          f"{format_size(bytes_done)} из {format_size(bytes_total)} | "
+          f"{format_size(speed)}/s | {rate:,.0f} файлов/с   ", end="")
+
+def _relative_path(path, root):
+    """Путь относительно корня с разделителями '/'"""
+    return os.path.relpath(path, root).replace(os.sep, '/')
+
+def hash_directory(root, algorithm="SHA-256", workers=None, progress=None, exclude=(), cache=None):
+    """Хеширование дерева: отсортированный список (отн. путь, размер, дайджест, ошибка)"""
+    excluded = {os.path.abspath(path) for path in exclude}
+    files = [(path, size) for path, size in walk_files(root)
+             if os.path.abspath(path) not in excluded]
+    files.sort(key=lambda item: _relative_path(item[0], root))
+
+    results = hash_paths(files, algorithm, workers, progress, cache)
+    return [(_relative_path(path, root), size, digest, error)
+            for path, size, digest, error in results]
+
+def write_manifest(manifest_path, entries, algorithm="SHA-256"):
+    """Запись манифеста: .json, .csv или текст в формате sha256sum"""
+    ext = os.path.splitext(manifest_path)[1].lower()
+    entries = [entry for entry in entries if entry[2]]
+
+    with open(manifest_path, 'w', encoding='utf-8', newline='') as f:
+        if ext == '.json':
+            json.dump({
+                "algorithm": algorithm,
+                "created": datetime.now().isoformat(timespec='seconds'),
+                "files": [{"path": path, "size": size, "digest": digest}
+                          for path, size, digest, _ in entries]
+            }, f, indent=2, ensure_ascii=False)
+        elif ext == '.csv':
+            writer = csv.writer(f)
+            writer.writerow(["path", "size", algorithm])
+            for path, size, digest, _ in entries:
+                writer.writerow([path, size, digest])
+        else:
+            for path, _, digest, _ in entries:
+                f.write(f"{digest}  {path}\n")
+
+def read_manifest(manifest_path):
+    """Чтение манифеста любого формата: (алгоритм, {отн. путь: дайджест})"""
+    ext = os.path.splitext(manifest_path)[1].lower()
+    expected = {}
+
+    with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+        if ext == '.json':
+            data = json.load(f)
+            files = data.get("files", []) if isinstance(data, dict) else None
+            if not isinstance(files, list):
+                raise ValueError("ожидается объект с полем files — списком записей")
+            algorithm = data.get("algorithm", "SHA-256")
+            for number, item in enumerate(files, 1):
+                if not (isinstance(item, dict) and isinstance(item.get("path"), str)
+                        and isinstance(item.get("digest"), str)):
+                    raise ValueError(f"запись {number}: нужны строковые поля path и digest")
+                expected[item["path"]] = item["digest"].lower()
+        elif ext == '.csv':
+            reader = csv.reader(f)
+            header = next(reader, ["path", "size", "SHA-256"])
+            algorithm = header[2] if len(header) > 2 else "SHA-256"
+            for row in reader:
+                if len(row) >= 3:
+                    expected[row[0]] = row[2].lower()
+        else:
+            algorithm = None
+            for line in f:
+                line = line.rstrip('\r\n')
+                if not line or line.startswith('#'):
+                    continue
+                digest, _, name = line.partition(' ')
+                # sha256sum помечает бинарный режим звёздочкой перед именем
+                if name[:1] in (' ', '*'):
+                    name = name[1:]
+                expected[name] = digest.lower()
+                algorithm = algorithm or DIGEST_LENGTHS.get(len(digest))
+            algorithm = algorithm or "SHA-256"
+
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"Неизвестный алгоритм манифеста: {algorithm}")
+    return algorithm, expected
+
+def verify_directory(root, manifest_path, workers=None, progress=None, cache=None):
+    """Проверка дерева по манифесту: словарь списков ok/failed/missing/new/errors"""
+    algorithm, expected = read_manifest(manifest_path)
+    report = {"ok": [], "failed": [], "missing": [], "new": [], "errors": []}
+
+    files = []
+    seen = set()
+    manifest_abs = os.path.abspath(manifest_path)
+    for path, size in walk_files(root):
+        rel = _relative_path(path, root)
+        if rel in expected:
+            files.append((path, size))
+            seen.add(rel)
+        elif os.path.abspath(path) != manifest_abs:
+            report["new"].append(rel)
+
+    report["missing"] = sorted(rel for rel in expected if rel not in seen)
+
+    for path, _, digest, error in hash_paths(files, algorithm, workers, progress, cache):
+        rel = _relative_path(path, root)
+        if error:
+            report["errors"].append(f"{rel}: {error}")
+        elif digest == expected[rel]:
+            report["ok"].append(rel)
+        else:
+            report["failed"].append(rel)
+
+    report["new"].sort()
+    return algorithm, report
+
+def directory_checksum(root):
+    """Режим директории: манифест контрольных сумм или проверка по нему"""
+    printc(f"\n🔐 КОНТРОЛЬНЫЕ СУММЫ ДИРЕКТОРИИ:", "header")
+    printc("1. Создать манифест (sha256sum / .json / .csv)", "text")
+    printc("2. Проверить по манифесту", "text")
+    printc("0. Пропустить", "text")
+
+    choice = input(f"\n{theme['accent']}Выбор: {theme['text']}")
+
+    if choice == '1':
+        try:
+            algorithm = parse_algorithms(input(
+                f"{theme['accent']}Алгоритм (Enter — SHA-256): {theme['text']}"), ("SHA-256",))[0]
+        except ValueError as e:
+            printc(str(e), "error")
+            return
+
+        default_name = f"checksums_{os.path.basename(os.path.abspath(root))}.{algorithm.lower().replace('-', '')}"
+        manifest_path = input(f"{theme['accent']}Файл манифеста (Enter — {default_name}): {theme['text']}").strip()
+        manifest_path = manifest_path or default_name
+
+        cache = get_hash_cache()
+        if cache is not None:
+            cache.reset_counters()
+
+        start = time.perf_counter()
+        entries = hash_directory(root, algorithm, progress=print_directory_progress,
+                                 exclude=(manifest_path,), cache=cache)
+        elapsed = time.perf_counter() - start
+        print()
+
+        write_manifest(manifest_path, entries, algorithm)
+
+        total_bytes = sum(size for _, size, digest, _ in entries if digest)
+        errors = [(path, error) for path, _, _, error in entries if error]
+        printc(f"\n✓ Манифест сохранён: {manifest_path}", "success")
+        printc(f"Файлов: {len(entries) - len(errors):,d} ({format_size(total_bytes)})", "text")
+        if elapsed > 0:
+            printc(f"Время: {elapsed:.2f} с | {format_size(total_bytes / elapsed)}/s", "text")
+        print_cache_counters(cache)
+        for path, error in errors[:10]:
+            printc(f"✗ {path}: {error}", "error")
+
+    elif choice == '2':
+        manifest_path = input(f"{theme['accent']}Путь к манифесту: {theme['text']}").strip()
+        if not os.path.isfile(manifest_path):
+            printc("Манифест не найден!", "error")
+            return
+
+        # Проверка целостности всегда перечитывает файлы, кэш здесь не используется
+        try:
+            algorithm, report = verify_directory(root, manifest_path, progress=print_directory_progress)
+        except ValueError as e:
+            printc(f"\nНекорректный манифест: {e}", "error")
+            return
+        print()
+
+        printc(f"\nАлгоритм: {algorithm}", "header")
+        printc(f"✓ Совпадают: {len(report['ok']):,d}", "success")
+        for key, title in (("failed", "Не совпадают"), ("missing", "Отсутствуют"),
+                           ("new", "Нет в манифесте"), ("errors", "Ошибки чтения")):
+            items = report[key]
+            printc(f"{'✗' if items else '✓'} {title}: {len(items):,d}", "error" if items else "text")
+            for item in items[:10]:
+                printc(f"    {item}", "accent")
+            if len(items) > 10:
+                printc(f"    ... и ещё {len(items) - 10}", "text")
+
+# ==================== ПАКЕТНАЯ ОБРАБОТКА СТРОК ====================
+
+# Объём строк, читаемый за один readlines() (пакет записей)
+BULK_BATCH_BYTES = 1024 * 1024
+
+def iter_line_batches(stream, batch_bytes=BULK_BATCH_BYTES):
+    """Пакеты строк потока без символов перевода строки"""
+    newline = b"\r\n" if isinstance(stream.read(0), bytes) else "\r\n"
+    while True:
+        lines = stream.readlines(batch_bytes)
+        if not lines:
+            return
+        yield [line.rstrip(newline) for line in lines]
+
+def map_batches(func, batches, workers=1, executor_class=ThreadPoolExecutor, args=()):
+    """func(batch, *args) для каждого пакета с сохранением порядка.
+
+    В пуле одновременно находится не больше 2 * workers пакетов, поэтому
+    память не растёт с размером входа.
+    """
+    if workers <= 1:
+        for batch in batches:
+            yield func(batch, *args)
+        return
+
+    with executor_class(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(func, batch, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def format_throughput(records, nbytes, elapsed):
+    """Итог пакетной обработки: записи, объём и скорость"""
+    elapsed = max(elapsed, 1e-9)
+    return (f"Записей: {records:,d} | {format_size(nbytes)} за {elapsed:.2f} с | "
+            f"{records / elapsed:,.0f} записей/с | {format_size(nbytes / elapsed)}/s")
+
 # ==================== СИСТЕМНЫЕ ФУНКЦИИ ====================
 
+PROCESS_TOP_INTERVAL = 2.0
+
+class LiveScreen:
+    """Живой экран: перерисовываются только изменившиеся строки (ANSI-позиционирование)"""
+
+    def __init__(self):
+        self.lines = []
+
+    def __enter__(self):
+        sys.stdout.write("\x1b[?25l\x1b[2J")
+        return self
+
+    def __exit__(self, *exc):
+        sys.stdout.write(f"\x1b[{len(self.lines) + 1};1H\x1b[?25h{Style.RESET_ALL}\n")
+        sys.stdout.flush()
+
+    def draw(self, lines):
+        out = []
+        for row, line in enumerate(lines):
+            if row >= len(self.lines) or self.lines[row] != line:
+                out.append(f"\x1b[{row + 1};1H{line}{Style.RESET_ALL}\x1b[K")
+        for row in range(len(lines), len(self.lines)):
+            out.append(f"\x1b[{row + 1};1H\x1b[K")
+        self.lines = list(lines)
+        if out:
+            sys.stdout.write("".join(out))
+            sys.stdout.flush()
+
+def run_live(render, interval):
+    """Обновлять экран функцией render() каждые interval секунд до Ctrl+C"""
+    with LiveScreen() as screen:
+        try:
+            while True:
+                screen.draw(render())
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+class ProcessTable:
+    """Процессы между обновлениями.
+
+    Объекты psutil.Process живут между тиками, поэтому cpu_percent() — это
+    реальная дельта с прошлого обновления, а не 0.0 первого вызова.
+    is_running() сверяет время создания: повторно выданный PID получает новый
+    объект, а не дельту от времени CPU умершего процесса.
+    Атрибуты процесса читаются одним oneshot().
+    """
+
+    def __init__(self, psutil):
+        self.psutil = psutil
+        self.procs = {}
+
+    def refresh(self):
+        """Строки (pid, имя, CPU %, память %, статус)"""
+        psutil = self.psutil
+        procs = {}
+        rows = []
+        for pid in psutil.pids():
+            try:
+                proc = self.procs.get(pid)
+                if proc is None or not proc.is_running():
+                    proc = psutil.Process(pid)
+                procs[pid] = proc
+                with proc.oneshot():
+                    rows.append((pid, proc.name(), proc.cpu_percent(None),
+                                 proc.memory_percent(), proc.status()))
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            except psutil.AccessDenied:
+                rows.append((pid, "N/A", 0.0, 0.0, "?"))
+        self.procs = procs
+        return rows
+
+def format_process_row(row):
+    """Строка таблицы процессов с подсветкой CPU и памяти"""
+    pid, name, cpu, mem, status = row
+    name = name[:19] if name else 'N/A'
+    status = status[:9] if status else 'N/A'
+    cpu_color = theme['error'] if cpu > 50 else theme['accent'] if cpu > 20 else theme['text']
+    mem_color = theme['error'] if mem > 10 else theme['accent'] if mem > 5 else theme['text']
+    return (f"{theme['text']}{pid:6} {name:20} {cpu_color}{cpu:6.1f}{Fore.RESET} "
+            f"{mem_color}{mem:9.1f}{Fore.RESET} {status:>10}")
+
+PROCESS_HEADER = f"{'PID':>6} {'Имя':20} {'CPU %':>6} {'Память %':>9} {'Статус':>10}"
+
+def process_top(psutil, interval=PROCESS_TOP_INTERVAL, sort_key=2):
+    """Живой режим как top: обновление до Ctrl+C"""
+    table = ProcessTable(psutil)
+    table.refresh()
+    psutil.cpu_percent(None)
+
+    def render():
+        rows = table.refresh()
+        rows.sort(key=lambda row: row[sort_key], reverse=True)
+        memory = psutil.virtual_memory()
+        height = shutil.get_terminal_size((80, 24)).lines
+        lines = [
+            f"{theme['header']}📊 {datetime.now():%H:%M:%S} | процессов: {len(rows)} | "
+            f"CPU: {psutil.cpu_percent(None):5.1f}% | память: {memory.percent:5.1f}% | Ctrl+C — выход",
+            f"{theme['header']}{PROCESS_HEADER}",
+            f"{theme['header']}{'─' * 60}",
+        ]
+        lines.extend(format_process_row(row) for row in rows[:max(1, height - len(lines) - 1)])
+        return lines
+
+    time.sleep(min(interval, 1.0))
+    run_live(render, interval)
+
+# Сэмплер метрик: фиксированное окно истории, память не растёт со временем работы
+METRICS_INTERVAL = 1.0
+METRICS_WINDOW = 300
+METRICS_TOP = 5
+METRICS_FLUSH = 10.0
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+METRIC_SERIES = (
+    ("cpu_percent", "CPU, %"),
+    ("memory_percent", "Память, %"),
+    ("disk_percent", "Диск /, %"),
+    ("disk_read_bytes_per_second", "Чтение диска"),
+    ("disk_write_bytes_per_second", "Запись диска"),
+    ("net_sent_bytes_per_second", "Сеть: отправка"),
+    ("net_recv_bytes_per_second", "Сеть: приём"),
+)
+
+class RingBuffer:
+    """Кольцевой буфер чисел фиксированного размера на array('d')"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array.array('d', bytes(8 * capacity))
+        self.pos = 0
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.pos] = value
+        self.pos = (self.pos + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def values(self):
+        """Значения от старых к новым"""
+        if self.count < self.capacity:
+            return self.data[:self.count]
+        return self.data[self.pos:] + self.data[:self.pos]
+
+def window_stats(values):
+    """min/avg/p95/max окна (p95 — ближайший ранг)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "min": ordered[0],
+        "avg": math.fsum(ordered) / len(ordered),
+        "p95": ordered[math.ceil(0.95 * len(ordered)) - 1],
+        "max": ordered[-1],
+    }
+
+def sparkline(values, width):
+    """Последние width значений блоками ▁..█ в масштабе окна"""
+    values = values[-width:]
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    scale = (len(SPARK_CHARS) - 1) / (high - low) if high > low else 0
+    return "".join(SPARK_CHARS[int((value - low) * scale)] for value in values)
+
+class MetricsSampler(threading.Thread):
+    """Фоновый сэмплер CPU, памяти, диска, сети и топ-N процессов.
+
+    История хранится в кольцевых буферах размера window, поэтому память
+    ограничена. Собственное время CPU потока учитывается в overhead().
+    top=0 отключает обход процессов — самую дорогую часть тика.
+    """
+
+    def __init__(self, psutil, interval=METRICS_INTERVAL, window=METRICS_WINDOW, top=METRICS_TOP):
+        super().__init__(name="edge-metrics", daemon=True)
+        self.psutil = psutil
+        self.interval = interval
+        self.top = top
+        self.table = ProcessTable(psutil) if top else None
+        self.times = RingBuffer(window)
+        self.series = {key: RingBuffer(window) for key, _ in METRIC_SERIES}
+        self.top_history = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.cpu_time = 0.0
+        self.started = None
+
+    def _counters(self):
+        disk = self.psutil.disk_io_counters()
+        net = self.psutil.net_io_counters()
+        return (disk.read_bytes if disk else 0, disk.write_bytes if disk else 0,
+                net.bytes_sent, net.bytes_recv)
+
+    def run(self):
+        psutil = self.psutil
+        self.started = time.monotonic()
+        begin = time.thread_time()
+        psutil.cpu_percent(None)
+        if self.table:
+            self.table.refresh()
+        last, counters = self.started, self._counters()
+        self.cpu_time += time.thread_time() - begin
+
+        deadline = self.started
+        while True:
+            deadline += self.interval
+            if self.stopped.wait(max(0.0, deadline - time.monotonic())):
+                break
+            begin = time.thread_time()
+            now, current = time.monotonic(), self._counters()
+            elapsed = max(now - last, 1e-9)
+            values = [psutil.cpu_percent(None), psutil.virtual_memory().percent,
+                      psutil.disk_usage('/').percent]
+            values.extend(max(0, new - old) / elapsed for new, old in zip(current, counters))
+            last, counters = now, current
+            top = ()
+            if self.table:
+                rows = self.table.refresh()
+                rows.sort(key=lambda row: row[2], reverse=True)
+                top = tuple(rows[:self.top])
+            with self.lock:
+                self.times.append(time.time())
+                for ring, value in zip(self.series.values(), values):
+                    ring.append(value)
+                if self.table:
+                    self.top_history.append(top)
+            self.cpu_time += time.thread_time() - begin
+            # Отстали больше чем на тик (сон, нагрузка) — не догоняем пачкой
+            if time.monotonic() - deadline > self.interval:
+                deadline = time.monotonic()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def overhead(self):
+        """Доля одного ядра, которую тратит сэмплер, %"""
+        if not self.started:
+            return 0.0
+        return 100 * self.cpu_time / max(time.monotonic() - self.started, 1e-9)
+
+    def snapshot(self):
+        """Копия окна: время, ряды и топ процессов"""
+        with self.lock:
+            return {
+                "times": list(self.times.values()),
+                "series": {key: list(ring.values()) for key, ring in self.series.items()},
+                "top": list(self.top_history),
+            }
+
+def format_metric(key, value):
+    if key.endswith("_per_second"):
+        return f"{format_size(value)}/s"
+    return f"{value:.1f}"
+
+def write_metrics_csv(snapshot, dst):
+    """Окно метрик в CSV: строка на тик"""
+    writer = csv.writer(dst)
+    writer.writerow(["time"] + [key for key, _ in METRIC_SERIES] + ["top_processes"])
+    top = snapshot["top"] or [()] * len(snapshot["times"])
+    for i, moment in enumerate(snapshot["times"]):
+        row = [datetime.fromtimestamp(moment).isoformat(timespec="milliseconds")]
+        row.extend(f"{snapshot['series'][key][i]:.2f}" for key, _ in METRIC_SERIES)
+        row.append(" ".join(f"{name}({pid})={cpu:.1f}" for pid, name, cpu, *_ in top[i]))
+        writer.writerow(row)
+
+def _prometheus_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def write_metrics_prometheus(snapshot, dst):
+    """Окно метрик в текстовом формате Prometheus: последнее значение и статистика окна"""
+    lines = []
+    for key, label in METRIC_SERIES:
+        values = snapshot["series"][key]
+        if not values:
+            continue
+        name = f"edge_{key}"
+        lines.append(f"# HELP {name} {label}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {values[-1]:.6g}")
+        lines.append(f"# TYPE {name}_window gauge")
+        for stat_name, value in window_stats(values).items():
+            lines.append(f'{name}_window{{stat="{stat_name}"}} {value:.6g}')
+    if snapshot["top"]:
+        lines.append("# HELP edge_process_cpu_percent CPU % процессов из топа последнего тика")
+        lines.append("# TYPE edge_process_cpu_percent gauge")
+        for pid, name, cpu, *_ in snapshot["top"][-1]:
+            lines.append(f'edge_process_cpu_percent{{pid="{pid}",name="{_prometheus_label(name)}"}} {cpu:.6g}')
+    dst.write("\n".join(lines) + "\n")
+
+METRICS_WRITERS = {"csv": write_metrics_csv, "prom": write_metrics_prometheus}
+
+def export_metrics(snapshot, path, fmt):
+    """Атомарно записать окно в файл (безопасно для textfile-коллектора node_exporter)"""
+    with open(path + ".tmp", 'w', encoding='utf-8', newline='') as f:
+        METRICS_WRITERS[fmt](snapshot, f)
+    os.replace(path + ".tmp", path)
+
+def render_metrics(sampler):
+    """Строки живого экрана: спарклайны и min/avg/p95/max окна"""
+    snapshot = sampler.snapshot()
+    width = max(10, shutil.get_terminal_size((80, 24)).columns - 70)
+    count = len(snapshot["times"])
+    lines = [
+        f"{theme['header']}📈 {datetime.now():%H:%M:%S} | тиков: {count} | интервал: {sampler.interval:g} с | "
+        f"затраты сэмплера: {sampler.overhead():.2f}% CPU | Ctrl+C — выход",
+        f"{theme['header']}{'Метрика':16} {'сейчас':>11} {'min':>11} {'avg':>11} {'p95':>11} {'max':>11}  история",
+    ]
+    for key, label in METRIC_SERIES:
+        values = snapshot["series"][key]
+        if not values:
+            lines.append(f"{theme['text']}{label:16} {'—':>11}")
+            continue
+        stats = window_stats(values)
+        cells = " ".join(f"{format_metric(key, stats[name]):>11}" for name in ("min", "avg", "p95", "max"))
+        lines.append(f"{theme['text']}{label:16} {theme['accent']}{format_metric(key, values[-1]):>11}"
+                     f"{theme['text']} {cells}  {theme['accent']}{sparkline(values, width)}")
+    if snapshot["top"]:
+        lines.append("")
+        lines.append(f"{theme['header']}Топ процессов по CPU:")
+        lines.extend(format_process_row(row) for row in snapshot["top"][-1])
+    return lines
+
+def metrics_mode(psutil):
+    """Сэмплер метрик в живом режиме с экспортом окна"""
+    interval = float(input(f"{theme['accent']}Интервал, с (Enter — {METRICS_INTERVAL:g}): {theme['text']}").strip()
+                     or METRICS_INTERVAL)
+    window = int(input(f"{theme['accent']}Размер окна, тиков (Enter — {METRICS_WINDOW}): {theme['text']}").strip()
+                 or METRICS_WINDOW)
+    if interval <= 0 or window < 1:
+        raise ValueError("интервал и окно должны быть положительными")
+
+    sampler = MetricsSampler(psutil, interval, window)
+    sampler.start()
+    try:
+        run_live(lambda: render_metrics(sampler), min(interval, 1.0))
+    finally:
+        sampler.stop()
+
+    fmt = input(f"\n{theme['accent']}Экспорт окна: csv или prom (Enter — пропустить): {theme['text']}").strip().lower()
+    if not fmt:
+        return
+    if fmt not in METRICS_WRITERS:
+        raise ValueError(f"неизвестный формат: {fmt}")
+    path = input(f"{theme['accent']}Файл (Enter — edge_metrics.{fmt}): {theme['text']}").strip() or f"edge_metrics.{fmt}"
+    export_metrics(sampler.snapshot(), path, fmt)
+    printc(f"✓ Сохранено: {path} ({len(sampler.times.values())} тиков)", "success")
+
+# Счётчики по устройствам: скорость считается по разнице двух выборок
+RATE_INTERVAL = 0.5
+
+class IORateMeter:
+    """Скорости по сетевым интерфейсам (pernic) и дискам (perdisk).
+
+    sample() возвращает скорости с прошлого вызова: байты/пакеты/ошибки в
+    секунду для сети; IOPS, байты в секунду, средняя задержка операции
+    (дельта read_time/write_time на операцию) и занятость для дисков.
+    """
+
+    def __init__(self, psutil):
+        self.psutil = psutil
+        self.last = time.monotonic()
+        self.nics = psutil.net_io_counters(pernic=True, nowrap=True)
+        self.disks = psutil.disk_io_counters(perdisk=True, nowrap=True) or {}
+
+    def sample(self):
+        now = time.monotonic()
+        nics = self.psutil.net_io_counters(pernic=True, nowrap=True)
+        disks = self.psutil.disk_io_counters(perdisk=True, nowrap=True) or {}
+        elapsed = max(now - self.last, 1e-9)
+
+        def rate(new, old, field):
+            return max(0, getattr(new, field) - getattr(old, field)) / elapsed
+
+        nic_rows = []
+        for name, cur in nics.items():
+            old = self.nics.get(name)
+            if old is None:
+                continue
+            errors = sum(rate(cur, old, field) for field in ("errin", "errout", "dropin", "dropout"))
+            nic_rows.append((name, rate(cur, old, "bytes_recv"), rate(cur, old, "bytes_sent"),
+                             rate(cur, old, "packets_recv"), rate(cur, old, "packets_sent"), errors))
+
+        disk_rows = []
+        for name, cur in disks.items():
+            old = self.disks.get(name)
+            if old is None:
+                continue
+            reads = max(0, cur.read_count - old.read_count)
+            writes = max(0, cur.write_count - old.write_count)
+            read_ms = max(0, cur.read_time - old.read_time) / reads if reads else 0.0
+            write_ms = max(0, cur.write_time - old.write_time) / writes if writes else 0.0
+            # busy_time есть только в Linux и FreeBSD
+            busy = (min(100.0, max(0, cur.busy_time - old.busy_time) / (elapsed * 10))
+                    if hasattr(cur, "busy_time") else None)
+            disk_rows.append((name, reads / elapsed, writes / elapsed, rate(cur, old, "read_bytes"),
+                              rate(cur, old, "write_bytes"), read_ms, write_ms, busy))
+
+        self.last, self.nics, self.disks = now, nics, disks
+        # Активные устройства сверху
+        nic_rows.sort(key=lambda row: row[1] + row[2], reverse=True)
+        disk_rows.sort(key=lambda row: row[1] + row[2], reverse=True)
+        return nic_rows, disk_rows
+
+def format_rate(value):
+    return f"{format_size(value)}/s" if value else "—"
+
+def render_io_rates(meter, interval):
+    """Строки живого экрана скоростей сети и дисков"""
+    nic_rows, disk_rows = meter.sample()
+    height = shutil.get_terminal_size((80, 24)).lines
+    # Поровну строк на сеть и диски, но не меньше трёх на раздел
+    room = max(3, (height - 8) // 2)
+    lines = [
+        f"{theme['header']}📶 {datetime.now():%H:%M:%S} | интервал: {interval:g} с | Ctrl+C — выход",
+        "",
+        f"{theme['header']}{'Интерфейс':16} {'Приём':>14} {'Отправка':>14} {'Пак/с вх':>9} {'Пак/с исх':>9} {'Ошибки/с':>9}",
+    ]
+    for name, recv, sent, packets_recv, packets_sent, errors in nic_rows[:room]:
+        color = theme['accent'] if recv or sent else theme['text']
+        lines.append(f"{color}{name[:16]:16} {format_rate(recv):>14} {format_rate(sent):>14} "
+                     f"{packets_recv:9.0f} {packets_sent:9.0f} "
+                     f"{theme['error'] if errors else color}{errors:9.0f}")
+    lines.append("")
+    lines.append(f"{theme['header']}{'Диск':16} {'Чтение':>14} {'Запись':>14} {'IOPS чт':>9} {'IOPS зап':>9} "
+                 f"{'мс/чт':>7} {'мс/зап':>7} {'Занят':>6}")
+    for name, reads, writes, read_bytes, write_bytes, read_ms, write_ms, busy in disk_rows[:room]:
+        color = theme['accent'] if reads or writes else theme['text']
+        busy_text = "—" if busy is None else f"{busy:.0f}%"
+        if busy is not None and busy > 80:
+            color = theme['error']
+        lines.append(f"{color}{name[:16]:16} {format_rate(read_bytes):>14} {format_rate(write_bytes):>14} "
+                     f"{reads:9.0f} {writes:9.0f} {read_ms:7.1f} {write_ms:7.1f} {busy_text:>6}")
+    return lines
+
+def io_rates_mode(psutil):
+    """Живая таблица скоростей сети и дисков по устройствам"""
+    interval = float(input(f"{theme['accent']}Интервал, с (Enter — {RATE_INTERVAL:g}): {theme['text']}").strip()
+                     or RATE_INTERVAL)
+    if interval <= 0:
+        raise ValueError("интервал должен быть положительным")
+    meter = IORateMeter(psutil)
+    run_live(lambda: render_io_rates(meter, interval), interval)
+
+PROCESS_TREE_INTERVAL = 2.0
+TREE_TOTALS = ("cpu", "rss", "files", "threads", "io")
+
+class ProcessTree:
+    """Дерево процессов с суммами CPU, RSS, файлов, потоков и I/O по поддеревьям.
+
+    Изменяемые атрибуты читаются одним oneshot() на процесс. Имя, exe и
+    cmdline кэшируются по (pid, create_time) — при повторном использовании
+    PID ключ меняется. CPU % и I/O считаются по разнице с прошлым обновлением.
+    RSS суммируется как есть: общая память потомков учитывается дважды.
+    """
+
+    def __init__(self, psutil):
+        self.psutil = psutil
+        self.static = {}
+        self.previous = {}
+        self.nodes = {}
+        self.children = {}
+        self.roots = []
+
+    def _field(self, method, default):
+        try:
+            return method()
+        except (self.psutil.AccessDenied, AttributeError, NotImplementedError):
+            return default
+
+    def _collect(self, pid, now):
+        proc = self.psutil.Process(pid)
+        key = (pid, proc.create_time())
+        with proc.oneshot():
+            static = self.static.get(key)
+            if static is None:
+                static = (proc.name(), self._field(proc.exe, ""), self._field(proc.cmdline, []))
+            times = self._field(proc.cpu_times, None)
+            cpu_time = times.user + times.system if times else 0.0
+            io = self._field(proc.io_counters, None)
+            io_bytes = io.read_bytes + io.write_bytes if io else 0
+            memory = self._field(proc.memory_info, None)
+            # num_fds — POSIX, num_handles — Windows
+            files = self._field(getattr(proc, "num_fds", None) or proc.num_handles, 0)
+            node = {
+                "pid": pid, "ppid": self._field(proc.ppid, 0),
+                "name": static[0], "exe": static[1], "cmdline": static[2],
+                "rss": memory.rss if memory else 0, "files": files,
+                "threads": self._field(proc.num_threads, 0),
+            }
+
+        last = self.previous.get(key)
+        elapsed = now - last[2] if last else 0
+        node["cpu"] = max(0.0, cpu_time - last[0]) * 100 / elapsed if elapsed else 0.0
+        node["io"] = max(0, io_bytes - last[1]) / elapsed if elapsed else 0.0
+        return key, static, (cpu_time, io_bytes, now), node
+
+    def refresh(self):
+        """Перечитать процессы и пересчитать суммы по поддеревьям"""
+        psutil = self.psutil
+        now = time.monotonic()
+        static, previous, nodes = {}, {}, {}
+        for pid in psutil.pids():
+            try:
+                key, static[key], previous[key], nodes[pid] = self._collect(pid, now)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+                continue
+        # Умершие процессы уходят из кэша вместе со своими ключами
+        self.static, self.previous, self.nodes = static, previous, nodes
+
+        children = {}
+        roots = []
+        for pid, node in nodes.items():
+            ppid = node["ppid"]
+            if ppid in nodes and ppid != pid:
+                children.setdefault(ppid, []).append(pid)
+            else:
+                roots.append(pid)
+
+        # Обход в обратном порядке: потомки суммируются раньше родителей
+        order = []
+        visited = set(roots)
+        stack = list(roots)
+        unreached = iter(list(nodes))
+        while True:
+            while stack:
+                pid = stack.pop()
+                order.append(pid)
+                for child in children.get(pid, ()):
+                    if child not in visited:
+                        visited.add(child)
+                        stack.append(child)
+            # Цикл ppid (устаревшие ppid и повторные PID в Windows) недостижим из
+            # корней: первый такой узел становится корнем, ссылка на него убирается
+            start = next((pid for pid in unreached if pid not in visited), None)
+            if start is None:
+                break
+            roots.append(start)
+            children[nodes[start]["ppid"]].remove(start)
+            visited.add(start)
+            stack.append(start)
+        for pid in reversed(order):
+            node = nodes[pid]
+            total = {field: node[field] for field in TREE_TOTALS}
+            total["count"] = 1
+            for child in children.get(pid, ()):
+                for field, value in nodes[child]["total"].items():
+                    total[field] += value
+            node["total"] = total
+
+        heaviest = lambda pid: (nodes[pid]["total"]["cpu"], nodes[pid]["total"]["rss"])
+        for kids in children.values():
+            kids.sort(key=heaviest, reverse=True)
+        roots.sort(key=heaviest, reverse=True)
+        self.children, self.roots = children, roots
+        return nodes
+
+    def walk(self, limit=None):
+        """(pid, префикс) в порядке дерева, тяжёлые поддеревья первыми"""
+        stack = [(pid, "", "") for pid in reversed(self.roots)]
+        count = 0
+        while stack and (limit is None or count < limit):
+            pid, prefix, branch = stack.pop()
+            yield pid, prefix + branch
+            count += 1
+            kids = self.children.get(pid, ())
+            child_prefix = prefix + ("│  " if branch == "├─ " else "   " if branch else "")
+            for i, kid in enumerate(reversed(kids)):
+                stack.append((kid, child_prefix, "└─ " if i == 0 else "├─ "))
+
+PROCESS_TREE_HEADER = (f"{'PID':>7} {'CPU %':>6} {'RSS':>10} {'Файлы':>6} {'Потоки':>6} "
+                       f"{'I/O':>12} {'Проц.':>5}  Дерево (суммы по поддереву)")
+
+def format_tree_row(node, prefix):
+    total = node["total"]
+    color = theme['error'] if total["cpu"] > 50 else theme['accent'] if total["cpu"] > 20 else theme['text']
+    return (f"{color}{node['pid']:7} {total['cpu']:6.1f} {format_size(total['rss']):>10} {total['files']:6} "
+            f"{total['threads']:6} {format_rate(total['io']):>12} {total['count']:5}  {prefix}{node['name']}")
+
+def render_process_tree(tree, interval):
+    nodes = tree.refresh()
+    height = shutil.get_terminal_size((80, 24)).lines
+    lines = [
+        f"{theme['header']}🌳 {datetime.now():%H:%M:%S} | процессов: {len(nodes)} | интервал: {interval:g} с | "
+        f"Ctrl+C — выход",
+        f"{theme['header']}{PROCESS_TREE_HEADER}",
+    ]
+    lines.extend(format_tree_row(nodes[pid], prefix) for pid, prefix in tree.walk(max(1, height - 3)))
+    return lines
+
+def print_process_details(tree, pid):
+    """Подробности процесса: свои значения и суммы по поддереву"""
+    node = tree.nodes.get(pid)
+    if node is None:
+        printc(f"✗ Процесс {pid} не найден", "error")
+        return
+    total = node["total"]
+    printc(f"\n🔎 {node['name']} (PID {pid}, родитель {node['ppid']})", "header")
+    printc(f"Путь: {node['exe'] or 'N/A'}", "text")
+    printc(f"Команда: {' '.join(node['cmdline']) or 'N/A'}", "text")
+    printc(f"{'':14} {'процесс':>12} {'поддерево':>12}", "header")
+    for label, field, fmt in (("CPU %", "cpu", "{:.1f}".format), ("RSS", "rss", format_size),
+                              ("Файлы", "files", str), ("Потоки", "threads", str), ("I/O", "io", format_rate)):
+        printc(f"{label:14} {fmt(node[field]):>12} {fmt(total[field]):>12}", "text")
+    printc(f"Процессов в поддереве: {total['count']}", "text")
+    kids = tree.children.get(pid, ())
+    if kids:
+        printc("\nДочерние (по нагрузке поддерева):", "header")
+        for kid in kids[:10]:
+            print(format_tree_row(tree.nodes[kid], ""))
+
+def process_tree_mode(psutil):
+    """Живое дерево процессов, затем подробности по PID"""
+    interval = float(input(f"{theme['accent']}Интервал, с (Enter — {PROCESS_TREE_INTERVAL:g}): {theme['text']}").strip()
+                     or PROCESS_TREE_INTERVAL)
+    if interval <= 0:
+        raise ValueError("интервал должен быть положительным")
+    tree = ProcessTree(psutil)
+    tree.refresh()
+    time.sleep(min(interval, 1.0))
+    run_live(lambda: render_process_tree(tree, interval), interval)
+
+    while True:
+        pid = input(f"\n{theme['accent']}PID для подробностей (Enter — выход): {theme['text']}").strip()
+        if not pid:
+            break
+        if not pid.isdigit():
+            printc("✗ PID — целое число", "error")
+            continue
+        print_process_details(tree, int(pid))
+
+def process_snapshot(psutil):
+    """Снимок процессов и системы: CPU процессов измеряется за 0.5 с"""
+    printc("Сбор информации о процессах...", "accent")
+
+    table = ProcessTable(psutil)
+    table.refresh()
+    psutil.cpu_percent(None)
+    net_before, started = psutil.net_io_counters(), time.monotonic()
+    time.sleep(0.5)
+    processes = table.refresh()
+    cpu_total = psutil.cpu_percent(None)
+
+    # Сортируем по использованию CPU
+    processes.sort(key=lambda row: row[2], reverse=True)
+
+    printc(f"\nВсего процессов: {len(processes)}", "header")
+    printc(PROCESS_HEADER, "header")
+    printc("─" * 60, "header")
+
+    for row in processes[:25]:  # Показываем топ-25
+        print(format_process_row(row))
+
+    # Системная информация
+    printc(f"\n{'═'*60}", "header")
+    printc("📈 СИСТЕМНАЯ ИНФОРМАЦИЯ:", "header")
+
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+
+    # CPU информация
+    cpu_count = psutil.cpu_count()
+    cpu_freq = psutil.cpu_freq()
+    
+    printc(f"\n💻 ПРОЦЕССОР:", "header")
+    printc(f"Загрузка CPU: {cpu_total:.1f}%", 
+           "error" if cpu_total > 80 else "accent" if cpu_total > 50 else "text")
+    printc(f"Ядер/потоков: {cpu_count}", "text")
+    if cpu_freq:
+        printc(f"Частота: {cpu_freq.current:.0f} MHz", "text")
+    
+    # Память
+    printc(f"\n💾 ПАМЯТЬ:", "header")
+    printc(f"Использовано: {memory.percent:.1f}% ({memory.used//1024//1024:,d} MB)", 
+           "error" if memory.percent > 80 else "accent" if memory.percent > 50 else "text")
+    printc(f"Всего: {memory.total//1024//1024:,d} MB", "text")
+    printc(f"Доступно: {memory.available//1024//1024:,d} MB", "text")
+    
+    # Диск
+    printc(f"\n💿 ДИСК:", "header")
+    printc(f"Использовано: {disk.percent:.1f}%", 
+           "error" if disk.percent > 90 else "accent" if disk.percent > 70 else "text")
+    printc(f"Всего: {disk.total//1024//1024//1024:,d} GB", "text")
+    printc(f"Свободно: {disk.free//1024//1024//1024:,d} GB", "text")
+    
+    # Сеть
+    printc(f"\n🌐 СЕТЬ:", "header")
+    net_io = psutil.net_io_counters()
+    printc(f"Отправлено: {net_io.bytes_sent//1024//1024:,d} MB", "text")
+    printc(f"Получено: {net_io.bytes_recv//1024//1024:,d} MB", "text")
+    elapsed = time.monotonic() - started
+    printc(f"Сейчас: ↑ {format_size(max(0, net_io.bytes_sent - net_before.bytes_sent) / elapsed)}/s "
+           f"↓ {format_size(max(0, net_io.bytes_recv - net_before.bytes_recv) / elapsed)}/s "
+           f"(по устройствам — режим 4)", "text")
+    
+    # Температура (если доступно)
+    try:
+        temps = psutil.sensors_temperatures()
+        if temps:
+            printc(f"\n🌡️ ТЕМПЕРАТУРА:", "header")
+            for name, entries in temps.items():
+                for entry in entries[:1]:
+                    temp_color = "error" if entry.current > 80 else "accent" if entry.current > 60 else "text"
+                    printc(f"{name}: {entry.current:.1f}°C", temp_color)
+    except:
+        pass
+
 def process_monitor():
     """Монитор процессов"""
     print_header("📊 МОНИТОР ПРОЦЕССОВ")
@@ -129,96 +1736,34 @@ def process_monitor():
     try:
         import psutil
         
-        printc("Сбор информации о процессах...", "accent")
-        time.sleep(0.5)
-        
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'status']):
-            try:
-                processes.append(proc.info)
-            except:
-                pass
+        printc("Выберите режим:", "header")
+        printc("1. Снимок процессов и системы", "text")
+        printc("2. Живой режим (как top)", "text")
+        printc("3. Сэмплер метрик: история, спарклайны, экспорт", "text")
+        printc("4. Скорость сети и дисков по устройствам", "text")
+        printc("5. Дерево процессов с суммами по поддеревьям", "text")
         
-        # Сортируем по использованию CPU
-        processes.sort(key=lambda x: x['cpu_percent'] or 0, reverse=True)
+        choice = input(f"\n{theme['accent']}Выбор (Enter — 1): {theme['text']}").strip() or '1'
         
-        printc(f"\nВсего процессов: {len(processes)}", "header")
-        printc(f"{'PID':>6} {'Имя':20} {'CPU %':>6} {'Память %':>9} {'Статус':>10}", "header")
-        printc("─" * 60, "header")
-        
-        for proc in processes[:25]:  # Показываем топ-25
-            name = proc['name'][:19] if proc['name'] else 'N/A'
-            cpu = proc['cpu_percent'] or 0
-            mem = proc['memory_percent'] or 0
-            status = proc['status'][:9] if proc['status'] else 'N/A'
-            
-            if cpu > 50:
-                cpu_color = theme['error']
-            elif cpu > 20:
-                cpu_color = theme['accent']
-            else:
-                cpu_color = theme['text']
-            
-            if mem > 10:
-                mem_color = theme['error']
-            elif mem > 5:
-                mem_color = theme['accent']
-            else:
-                mem_color = theme['text']
-            
-            print(f"{proc['pid']:6} {name:20} {cpu_color}{cpu:6.1f}{Fore.RESET} {mem_color}{mem:9.1f}{Fore.RESET} {status:>10}")
-        
-        # Системная информация
-        printc(f"\n{'═'*60}", "header")
-        printc("📈 СИСТЕМНАЯ ИНФОРМАЦИЯ:", "header")
-        
-        cpu_total = psutil.cpu_percent(interval=0.5)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # CPU информация
-        cpu_count = psutil.cpu_count()
-        cpu_freq = psutil.cpu_freq()
-        
-        printc(f"\n💻 ПРОЦЕССОР:", "header")
-        printc(f"Загрузка CPU: {cpu_total:.1f}%", 
-               "error" if cpu_total > 80 else "accent" if cpu_total > 50 else "text")
-        printc(f"Ядер/потоков: {cpu_count}", "text")
-        if cpu_freq:
-            printc(f"Частота: {cpu_freq.current:.0f} MHz", "text")
-        
-        # Память
-        printc(f"\n💾 ПАМЯТЬ:", "header")
-        printc(f"Использовано: {memory.percent:.1f}% ({memory.used//1024//1024:,d} MB)", 
-               "error" if memory.percent > 80 else "accent" if memory.percent > 50 else "text")
-        printc(f"Всего: {memory.total//1024//1024:,d} MB", "text")
-        printc(f"Доступно: {memory.available//1024//1024:,d} MB", "text")
-        
-        # Диск
-        printc(f"\n💿 ДИСК:", "header")
-        printc(f"Использовано: {disk.percent:.1f}%", 
-               "error" if disk.percent > 90 else "accent" if disk.percent > 70 else "text")
-        printc(f"Всего: {disk.total//1024//1024//1024:,d} GB", "text")
-        printc(f"Свободно: {disk.free//1024//1024//1024:,d} GB", "text")
-        
-        # Сеть
-        printc(f"\n🌐 СЕТЬ:", "header")
-        net_io = psutil.net_io_counters()
-        printc(f"Отправлено: {net_io.bytes_sent//1024//1024:,d} MB", "text")
-        printc(f"Получено: {net_io.bytes_recv//1024//1024:,d} MB", "text")
-        
-        # Температура (если доступно)
-        try:
-            temps = psutil.sensors_temperatures()
-            if temps:
-                printc(f"\n🌡️ ТЕМПЕРАТУРА:", "header")
-                for name, entries in temps.items():
-                    for entry in entries[:1]:
-                        temp_color = "error" if entry.current > 80 else "accent" if entry.current > 60 else "text"
-                        printc(f"{name}: {entry.current:.1f}°C", temp_color)
-        except:
-            pass
+        if choice == '2':
+            sort = input(f"{theme['accent']}Сортировка: 1. CPU  2. Память (Enter — 1): {theme['text']}").strip()
+            interval = input(f"{theme['accent']}Интервал, с (Enter — {PROCESS_TOP_INTERVAL:g}): {theme['text']}").strip()
+            process_top(psutil, max(0.2, float(interval or PROCESS_TOP_INTERVAL)), 3 if sort == '2' else 2)
+        elif choice == '1':
+            process_snapshot(psutil)
+        elif choice == '3':
+            metrics_mode(psutil)
+        elif choice == '4':
+            io_rates_mode(psutil)
+        elif choice == '5':
+            process_tree_mode(psutil)
+        else:
+            printc("Неверный выбор!", "error")
         
+    except ValueError as e:
+        printc(f"\n✗ Ошибка: {e}", "error")
+    except OSError as e:
+        printc(f"\n✗ Ошибка: {e}", "error")
     except ImportError:
         printc("\n⚠ Для работы монитора процессов установите psutil:", "error")
         printc("pip install psutil", "accent")
@@ -306,174 +1851,706 @@ def system_info():
     
     wait_for_enter()
 
-def internet_speed_test():
-    """Тест скорости интернета"""
-    print_header("🌐 ТЕСТ СКОРОСТИ ИНТЕРНЕТА")
-    
-    printc("Внимание: Тест скорости использует открытые серверы для измерения.", "accent")
-    printc("Это может занять несколько секунд...\n", "text")
-    
-    test_servers = [
-        {"name": "Сервер 1", "url": "http://speedtest.ftp.otenet.gr/files/test1Mb.db"},
-        {"name": "Сервер 2", "url": "http://ipv4.download.thinkbroadband.com/5MB.zip"},
-        {"name": "Сервер 3", "url": "http://proof.ovh.net/files/1Mb.dat"}
-    ]
-    
-    printc("Выберите сервер для теста:", "header")
-    for i, server in enumerate(test_servers, 1):
-        printc(f"{i}. {server['name']}", "text")
-    
+# Тест скорости: N параллельных соединений, первые SPEED_WARMUP секунд не учитываются
+SPEED_SERVERS = (
+    {"name": "Сервер 1", "url": "http://speedtest.ftp.otenet.gr/files/test1Mb.db"},
+    {"name": "Сервер 2", "url": "http://ipv4.download.thinkbroadband.com/5MB.zip"},
+    {"name": "Сервер 3", "url": "http://proof.ovh.net/files/1Mb.dat"},
+)
+SPEED_STREAMS = 4
+SPEED_DURATION = 10.0
+SPEED_WARMUP = 2.0
+SPEED_SAMPLE = 0.25
+SPEED_CHUNK = 64 * 1024
+SPEED_TIMEOUT = 10
+SPEED_PERCENTILES = (5, 25, 50, 75, 95)
+# Локальный сервер: «бесконечный» файл из повторяющегося случайного блока
+SPEED_SERVER_SIZE = 1 << 40
+SPEED_SERVER_BLOCK = 1024 * 1024
+
+def parse_speed_size(text, base=10, minimum=0):
+    """Размер из запроса: целое от minimum до SPEED_SERVER_SIZE, иначе ValueError"""
+    size = int(text, base)
+    if not minimum <= size <= SPEED_SERVER_SIZE:
+        raise ValueError(f"размер вне диапазона {minimum}–{SPEED_SERVER_SIZE}: {size}")
+    return size
+
+class SpeedTestHandler(BaseHTTPRequestHandler):
+    """GET /download?size=N — N случайных байт, POST /upload — принять и отбросить тело"""
+
+    protocol_version = "HTTP/1.1"
+    block = b""
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        # Клиент теста рвёт соединения по окончании замера — это не ошибка
+        try:
+            super().handle()
+        except (ConnectionError, socket.timeout):
+            pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != "/download":
+            self.send_error(404)
+            return
+        try:
+            size = parse_speed_size(parse_qs(parts.query).get("size", [str(SPEED_SERVER_SIZE)])[0],
+                                    minimum=1)
+        except ValueError as e:
+            self.send_error(400, explain=str(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        block = memoryview(self.block)
+        try:
+            while size > 0:
+                self.wfile.write(block[:size])
+                size -= len(block)
+        except (ConnectionError, socket.timeout):
+            self.close_connection = True
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            received = 0
+            while True:
+                size = parse_speed_size(self.rfile.readline().split(b";")[0], 16)
+                if not size:
+                    # Завершающие заголовки до пустой строки
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return received
+                received += self._discard(size)
+                self.rfile.readline()
+        return self._discard(parse_speed_size(self.headers.get("Content-Length", "0")))
+
+    def _discard(self, left):
+        """Прочитать и отбросить до left байт тела. Вернёт число прочитанных"""
+        received = 0
+        while left > 0:
+            data = self.rfile.read(min(left, SPEED_SERVER_BLOCK))
+            if not data:
+                break
+            received += len(data)
+            left -= len(data)
+        return received
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/upload":
+            self.send_error(404)
+            return
+        try:
+            received = self._read_body()
+        except ValueError as e:
+            self.send_error(400, explain=str(e))
+            return
+        except (ConnectionError, socket.timeout):
+            self.close_connection = True
+            return
+        body = json.dumps({"received": received}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_speed_server(host="127.0.0.1", port=0):
+    """Локальный сервер теста скорости в фоновом потоке. Вернёт (server, base_url)"""
+    SpeedTestHandler.block = os.urandom(SPEED_SERVER_BLOCK)
+    server = ThreadingHTTPServer((host, port), SpeedTestHandler)
+    threading.Thread(target=server.serve_forever, name="edge-speed-server", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+def percentile(ordered, q):
+    """Перцентиль q (0–100) отсортированного списка, ближайший ранг"""
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def speed_test(url, direction="download", streams=SPEED_STREAMS, duration=SPEED_DURATION,
+               warmup=SPEED_WARMUP, progress=None):
+    """Скорость по streams параллельным соединениям за duration секунд.
+
+    У каждого потока своя requests.Session: соединение живёт между
+    повторными запросами. Первые warmup секунд (разгон TCP) не учитываются.
+    Выгрузка идёт chunked-телом, поэтому останавливается сразу по сигналу.
+    Возвращает dict: bytes, elapsed, mean (байт/с), samples, percentiles, errors.
+    """
+    import requests
+
+    if streams < 1 or duration <= warmup or warmup < 0:
+        raise ValueError("нужен хотя бы один поток и длительность больше прогрева")
+
+    stop = threading.Event()
+    counts = [0] * streams
+
+    def download(slot):
+        with requests.Session() as session:
+            while not stop.is_set():
+                with session.get(url, stream=True, timeout=SPEED_TIMEOUT) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(SPEED_CHUNK):
+                        counts[slot] += len(chunk)
+                        if stop.is_set():
+                            break
+
+    def upload(slot):
+        payload = os.urandom(SPEED_CHUNK)
+
+        def body():
+            while not stop.is_set():
+                yield payload
+                # Блок засчитывается, когда запись в сокет завершилась
+                counts[slot] += len(payload)
+
+        with requests.Session() as session:
+            while not stop.is_set():
+                session.post(url, data=body(), timeout=SPEED_TIMEOUT).raise_for_status()
+
+    worker = upload if direction == "upload" else download
+    samples = []
+    with ThreadPoolExecutor(max_workers=streams) as executor:
+        futures = [executor.submit(worker, slot) for slot in range(streams)]
+        start = last_time = time.monotonic()
+        last_bytes = 0
+        base = None
+        try:
+            while not all(future.done() for future in futures):
+                time.sleep(SPEED_SAMPLE)
+                now, total = time.monotonic(), sum(counts)
+                if base is not None:
+                    samples.append((total - last_bytes) / (now - last_time))
+                elif now - start >= warmup:
+                    base = (now, total)
+                last_time, last_bytes = now, total
+                if progress:
+                    progress(now - start, total, samples[-1] if samples else None, base is None)
+                if now - start >= duration:
+                    break
+        finally:
+            stop.set()
+        end, total = last_time, last_bytes
+
+    errors = [future.exception() for future in futures if future.exception()]
+    if base is None or end <= base[0]:
+        if errors:
+            raise errors[0]
+        raise RuntimeError("соединения закрылись до конца прогрева")
+    measured = total - base[1]
+    ordered = sorted(samples)
+    return {
+        "direction": direction,
+        "streams": streams,
+        "bytes": measured,
+        "elapsed": end - base[0],
+        "mean": measured / (end - base[0]),
+        "samples": samples,
+        "percentiles": {q: percentile(ordered, q) for q in SPEED_PERCENTILES} if ordered else {},
+        "errors": errors,
+    }
+
+def print_speed_progress(elapsed, total, rate, warming):
+    stage = "прогрев" if warming else "измерение"
+    current = f"{format_size(rate)}/s" if rate is not None else "—"
+    print(f"\r{stage}: {elapsed:5.1f} с | передано: {format_size(total)} | сейчас: {current}      ", end="")
+
+def format_mbps(rate):
+    return f"{rate / 1024 / 1024:.2f} MB/s ({rate * 8 / 1e6:.0f} Мбит/с)"
+
+def print_speed_report(title, result):
+    """Средняя скорость и перцентили по интервалам SPEED_SAMPLE"""
+    printc(f"\n\n{title}: {format_mbps(result['mean'])}", "success")
+    printc(f"Потоков: {result['streams']} | измерено {result['elapsed']:.1f} с, "
+           f"{format_size(result['bytes'])} (прогрев исключён)", "text")
+    if result["percentiles"]:
+        printc(f"Перцентили по интервалам {SPEED_SAMPLE:g} с:", "header")
+        for q, value in result["percentiles"].items():
+            printc(f"  p{q:<3} {format_mbps(value)}", "text")
+    if result["errors"]:
+        printc(f"⚠ Потоков с ошибкой: {len(result['errors'])} ({result['errors'][0]})", "error")
+
+def print_speed_rating(download_speed):
+    """Оценка скорости загрузки (MB/s) и что с ней можно делать"""
+    if download_speed > 50:
+        rating = "Отлично! 🚀"
+        color = "success"
+    elif download_speed > 20:
+        rating = "Хорошо! 👍"
+        color = "accent"
+    elif download_speed > 5:
+        rating = "Нормально 👌"
+        color = "text"
+    else:
+        rating = "Медленно 🐢"
+        color = "error"
+    
+    printc(f"Оценка: {rating}", color)
+    
+    # Примерная скорость в Мбит/с
+    mbps = download_speed * 8
+    
+    # Что можно делать с такой скоростью
+    printc(f"\n🎯 Возможности при такой скорости:", "header")
+    if mbps > 100:
+        printc("• 4K видео поток", "success")
+        printc("• Онлайн игры без лагов", "success")
+        printc("• Быстрая загрузка файлов", "success")
+    elif mbps > 50:
+        printc("• Full HD видео", "accent")
+        printc("• Видеозвонки HD", "accent")
+        printc("• Комфортный веб-сёрфинг", "accent")
+    elif mbps > 20:
+        printc("• HD видео", "text")
+        printc("• Аудио поток", "text")
+        printc("• Работа с облаками", "text")
+    else:
+        printc("• Базовый веб-сёрфинг", "error")
+        printc("• Электронная почта", "error")
+        printc("• Медленная загрузка", "error")
+
+def internet_speed_test():
+    """Тест скорости интернета"""
+    print_header("🌐 ТЕСТ СКОРОСТИ ИНТЕРНЕТА")
+    
+    printc("Внимание: Тест скорости использует открытые серверы для измерения.", "accent")
+    printc("Это может занять несколько секунд...\n", "text")
+    
+    printc("Выберите сервер для теста:", "header")
+    for i, server in enumerate(SPEED_SERVERS, 1):
+        printc(f"{i}. {server['name']}", "text")
+    printc(f"{len(SPEED_SERVERS) + 1}. Свой URL", "text")
+    printc(f"{len(SPEED_SERVERS) + 2}. Локальный сервер (офлайн, проверка самого теста)", "text")
+    
+    server = None
+    try:
+        choice = int(input(f"\n{theme['accent']}Выбор (1-{len(SPEED_SERVERS) + 2}): {theme['text']}")) - 1
+        
+        upload_url = None
+        if 0 <= choice < len(SPEED_SERVERS):
+            name, url = SPEED_SERVERS[choice]["name"], SPEED_SERVERS[choice]["url"]
+        elif choice == len(SPEED_SERVERS):
+            name = url = input(f"{theme['accent']}URL для загрузки: {theme['text']}").strip()
+            upload_url = input(f"{theme['accent']}URL для выгрузки POST (Enter — пропустить): {theme['text']}").strip()
+            if not url:
+                raise ValueError("URL не указан")
+        elif choice == len(SPEED_SERVERS) + 1:
+            server, base_url = start_speed_server()
+            name, url, upload_url = base_url, f"{base_url}/download", f"{base_url}/upload"
+        else:
+            printc("Неверный выбор!", "error")
+            wait_for_enter()
+            return
+        
+        streams = int(input(f"{theme['accent']}Потоков (Enter — {SPEED_STREAMS}): {theme['text']}").strip()
+                      or SPEED_STREAMS)
+        duration = float(input(f"{theme['accent']}Длительность, с (Enter — {SPEED_DURATION:g}): {theme['text']}").strip()
+                         or SPEED_DURATION)
+        
+        # Короткий тест: прогрев не больше половины длительности
+        warmup = min(SPEED_WARMUP, duration / 2)
+        
+        printc(f"\nТестирование через {name}...", "accent")
+        
+        # Тест скорости загрузки
+        printc("\n📥 Тестирование скорости загрузки...", "header")
+        result = speed_test(url, "download", streams, duration, warmup, print_speed_progress)
+        print_speed_report("📥 Результат загрузки", result)
+        print_speed_rating(result["mean"] / 1024 / 1024)
+        
+        if upload_url:
+            printc("\n📤 Тестирование скорости выгрузки...", "header")
+            result = speed_test(upload_url, "upload", streams, duration, warmup, print_speed_progress)
+            print_speed_report("📤 Результат выгрузки", result)
+    
+    except ValueError as e:
+        printc(f"\n✗ Неверный ввод: {e}", "error")
+    except ImportError:
+        printc("\n⚠ Для теста скорости установите requests:", "error")
+        printc("pip install requests", "accent")
+    except Exception as e:
+        printc(f"\n✗ Ошибка тестирования: {e}", "error")
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+    
+    wait_for_enter()
+
+# ==================== НОВЫЕ ФИШКИ ====================
+
+# Словари эмодзи в EMOJI_DICT_DIR: имя файла — код языка (en.xml, de.json)
+EMOJI_DICT_FORMATS = ('.json', '.tsv', '.txt', '.xml')
+EMOJI_INDEX_MAGIC = b"EDGEEMJ1"
+EMOJI_INDEX_BYTE_ORDER = 0x01020304
+
+# Встроенный словарь замен: слово или фраза (в нижнем регистре) -> эмодзи
+EMOJI_DICT = {
+    'смайл': '😊', 'улыбка': '😄', 'смех': '😂', 'подмиг': '😉',
+    'сердце': '❤️', 'любовь': '💖', 'звезда': '⭐', 'огонь': '🔥',
+    'молния': '⚡', 'снег': '❄️', 'солнце': '☀️', 'луна': '🌙',
+    'облако': '☁️', 'дождь': '🌧️', 'гроза': '⛈️', 'радуга': '🌈',
+    'кофе': '☕', 'чай': '🍵', 'пицца': '🍕', 'бургер': '🍔',
+    'торт': '🎂', 'мороженое': '🍦', 'пиво': '🍺', 'вино': '🍷',
+    'музыка': '🎵', 'гитара': '🎸', 'ноты': '🎶', 'фильм': '🎬',
+    'камера': '📷', 'телефон': '📱', 'компьютер': '💻', 'книга': '📚',
+    'письмо': '✉️', 'карандаш': '✏️', 'ключ': '🔑', 'часы': '⏰',
+    'деньги': '💰', 'банк': '🏦', 'машина': '🚗', 'самолет': '✈️',
+    'корабль': '🚢', 'поезд': '🚂', 'дом': '🏠', 'офис': '🏢',
+    'больница': '🏥', 'школа': '🏫', 'университет': '🎓', 'работа': '💼',
+    'спорт': '⚽', 'футбол': '⚽', 'баскетбол': '🏀', 'теннис': '🎾',
+    'плавание': '🏊', 'бег': '🏃', 'йога': '🧘', 'медитация': '🧘‍♂️',
+    'здоровье': '💪', 'болезнь': '🤒', 'доктор': '👨‍⚕️', 'медсестра': '👩‍⚕️',
+    'учитель': '👨‍🏫', 'студент': '👨‍🎓', 'программист': '👨‍💻', 'дизайнер': '👨‍🎨',
+    'хорошо': '👍', 'плохо': '👎', 'ок': '👌', 'привет': '👋',
+    'пока': '👋', 'спасибо': '🙏', 'пожалуйста': '🙏', 'извини': '😔',
+    'поздравляю': '🎉', 'день рождения': '🎂', 'новый год': '🎄',
+    'рождество': '🎅', 'халлоуин': '🎃', 'пасха': '🐰', 'отпуск': '🏖️',
+    'пляж': '🏖️', 'море': '🌊', 'горы': '⛰️', 'лес': '🌲',
+    'цветок': '🌸', 'дерево': '🌳', 'животное': '🐾', 'кошка': '🐱',
+    'собака': '🐶', 'птица': '🐦', 'рыба': '🐟', 'лев': '🦁',
+    'тигр': '🐯', 'медведь': '🐻', 'заяц': '🐰', 'волк': '🐺',
+    'сова': '🦉', 'дельфин': '🐬', 'кит': '🐋', 'акула': '🦈',
+    'змея': '🐍', 'ящерица': '🦎', 'паук': '🕷️', 'бабочка': '🦋',
+    'пчела': '🐝', 'муравей': '🐜', 'улитка': '🐌', 'червяк': '🐛'
+}
+
+class EmojiMatcher:
+    """Автомат Ахо — Корасик по ключам словаря эмодзи.
+
+    Все вхождения ключей, включая фразы из нескольких слов, находятся за
+    один проход по тексту независимо от размера словаря. entries — пары
+    (ключ, эмодзи) или тройки (ключ, эмодзи, только_целое_слово).
+    """
+
+    def __init__(self, entries):
+        self.goto = [{}]
+        self.fail = [0]
+        # Ключ, оканчивающийся в узле: длина и значение (индекс эмодзи * 2 + флаг целого слова)
+        self.out_len = [0]
+        self.out_value = [0]
+        # Ближайший суффикс-узел, в котором оканчивается ключ
+        self.dict_link = [0]
+        self.values = []
+        value_ids = {}
+        for entry in entries:
+            key, emoji = entry[0].lower(), entry[1]
+            whole = len(entry) > 2 and entry[2]
+            if not key:
+                continue
+            node = 0
+            for char in key:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = self.goto[node][char] = len(self.goto)
+                    self.goto.append({})
+                    for column in (self.fail, self.out_len, self.out_value, self.dict_link):
+                        column.append(0)
+                node = child
+            if self.out_len[node]:
+                continue
+            if emoji not in value_ids:
+                value_ids[emoji] = len(self.values)
+                self.values.append(emoji)
+            self.out_len[node] = len(key)
+            self.out_value[node] = value_ids[emoji] * 2 + bool(whole)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fail = self.fail[child] = self.goto[state].get(char, 0)
+                self.dict_link[child] = fail if self.out_len[fail] else self.dict_link[fail]
+
+    def _edges(self, node):
+        return self.goto[node]
+
+    def find(self, text):
+        """Совпадения (начало, конец, эмодзи): самые левые, при равном начале — самые длинные.
+
+        Ключи с флагом целого слова засчитываются только на границах слов.
+        """
+        goto, fail = self.goto, self.fail
+        out_len, out_value, dict_link, values = self.out_len, self.out_value, self.dict_link, self.values
+        size = len(text)
+        state = 0
+        candidates = []
+        for index, char in enumerate(text):
+            while True:
+                edges = goto[state]
+                if edges is None:
+                    edges = self._edges(state)
+                if not state or char in edges:
+                    break
+                state = fail[state]
+            state = edges.get(char, 0)
+
+            node = state if out_len[state] else dict_link[state]
+            while node:
+                start = index + 1 - out_len[node]
+                value = out_value[node]
+                if not value & 1 or ((start == 0 or not text[start - 1].isalnum()) and
+                                     (index + 1 == size or not text[index + 1].isalnum())):
+                    candidates.append((start, index + 1, values[value >> 1]))
+                    break
+                node = dict_link[node]
+
+        candidates.sort(key=lambda match: (match[0], -match[1]))
+        matches = []
+        last_end = 0
+        for start, end, emoji in candidates:
+            if start >= last_end:
+                matches.append((start, end, emoji))
+                last_end = end
+        return matches
+
+    def save(self, path):
+        """Записать автомат плоскими массивами (формат MappedEmojiMatcher), атомарно"""
+        edge_start = array.array('I', [0])
+        edge_char = array.array('I')
+        edge_target = array.array('I')
+        for edges in self.goto:
+            for char in sorted(edges):
+                edge_char.append(ord(char))
+                edge_target.append(edges[char])
+            edge_start.append(len(edge_char))
+        blob = "\0".join(self.values).encode('utf-8')
+
+        with open(path + ".tmp", 'wb') as f:
+            f.write(EMOJI_INDEX_MAGIC + struct.pack("=4I", len(self.goto), len(edge_char), len(blob),
+                                                    EMOJI_INDEX_BYTE_ORDER).ljust(24, b"\0"))
+            for column in (edge_start, edge_char, edge_target):
+                column.tofile(f)
+            for column in (self.fail, self.out_len, self.out_value, self.dict_link):
+                array.array('I', column).tofile(f)
+            f.write(blob)
+        os.replace(path + ".tmp", path)
+
+class MappedEmojiMatcher(EmojiMatcher):
+    """Автомат из файла индекса через mmap.
+
+    Загрузка не зависит от размера словаря: массивы читаются с диска по мере
+    обращения, переходы узла собираются в dict при первом посещении.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self.mm[:32]
+        if len(header) < 32 or header[:8] != EMOJI_INDEX_MAGIC:
+            raise ValueError(f"неверный формат индекса: {path}")
+        nodes, edges, blob_size, byte_order = struct.unpack("=4I", header[8:24])
+        if byte_order != EMOJI_INDEX_BYTE_ORDER:
+            raise ValueError(f"неверный формат индекса: {path}")
+        counts = (nodes + 1, edges, edges, nodes, nodes, nodes, nodes)
+        # Обрезанный файл: срезы вышли бы короче, а cast('I') — упал бы
+        if 32 + sum(counts) * 4 + blob_size != len(self.mm):
+            raise ValueError(f"индекс повреждён: {path}")
+
+        view = memoryview(self.mm)
+        offset = 32
+        sections = []
+        for count in counts:
+            sections.append(view[offset:offset + count * 4].cast('I'))
+            offset += count * 4
+        (self.edge_start, self.edge_char, self.edge_target,
+         self.fail, self.out_len, self.out_value, self.dict_link) = sections
+        self.values = bytes(view[offset:offset + blob_size]).decode('utf-8').split("\0")
+        self.goto = [None] * nodes
+
+    def _edges(self, node):
+        start, end = self.edge_start[node], self.edge_start[node + 1]
+        edges = self.goto[node] = dict(zip(map(chr, self.edge_char[start:end]), self.edge_target[start:end]))
+        return edges
+
+def emoji_languages():
+    """{язык: [файлы словарей]}; встроенный ru — словарь EMOJI_DICT"""
+    languages = {"ru": []}
+    if os.path.isdir(EMOJI_DICT_DIR):
+        for name in sorted(os.listdir(EMOJI_DICT_DIR)):
+            language, ext = os.path.splitext(name)
+            if ext.lower() in EMOJI_DICT_FORMATS:
+                languages.setdefault(language.lower(), []).append(os.path.join(EMOJI_DICT_DIR, name))
+    return languages
+
+def parse_emoji_languages(text):
+    """Языки через запятую в кортеж; неизвестный язык — ValueError"""
+    available = emoji_languages()
+    languages = tuple(dict.fromkeys(part.strip().lower() for part in text.split(',') if part.strip()))
+    unknown = [language for language in languages if language not in available]
+    if unknown or not languages:
+        raise ValueError(f"неизвестный словарь: {', '.join(unknown) or '—'}. "
+                         f"Доступны: {', '.join(available)}")
+    return languages
+
+def load_emoji_source(path):
+    """Пары (ключ, эмодзи) из файла словаря.
+
+    .json — объект {ключ: эмодзи}; .tsv/.txt — строки «ключ<TAB>эмодзи»;
+    .xml — аннотации CLDR (имена type="tts" важнее ключевых слов).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            return [(str(key), str(emoji)) for key, emoji in json.load(f).items()]
+    if ext == '.xml':
+        names, keywords = {}, {}
+        for _, element in ElementTree.iterparse(path):
+            if element.tag == 'annotation' and element.get('cp') and element.text:
+                if element.get('type') == 'tts':
+                    names.setdefault(element.text.strip(), element.get('cp'))
+                else:
+                    for keyword in element.text.split('|'):
+                        keywords.setdefault(keyword.strip(), element.get('cp'))
+            element.clear()
+        return list(names.items()) + [(key, emoji) for key, emoji in keywords.items() if key not in names]
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            key, _, emoji = line.rstrip('\r\n').partition('\t')
+            if key and emoji and not key.startswith('#'):
+                entries.append((key, emoji))
+    return entries
+
+def emoji_index_path(languages):
+    """Путь индекса: имя зависит от языков, файлов словарей и встроенного словаря"""
+    available = emoji_languages()
+    sources = []
+    for language in languages:
+        for path in available[language]:
+            stats = os.stat(path)
+            sources.append((path, stats.st_size, stats.st_mtime_ns))
+    builtin = sorted(EMOJI_DICT.items()) if "ru" in languages else []
+    digest = hashlib.sha256(json.dumps([EMOJI_INDEX_MAGIC.decode(), list(languages), sources, builtin],
+                                       ensure_ascii=False).encode()).hexdigest()[:16]
+    return os.path.join(EMOJI_INDEX_DIR, f"{'-'.join(languages)}-{digest}.idx")
+
+def build_emoji_matcher(languages):
+    """Собрать автомат из словарей. Встроенный словарь ищет ключ внутри слова,
+    внешние — только целые слова и фразы"""
+    available = emoji_languages()
+    entries = []
+    for language in languages:
+        if language == "ru":
+            entries.extend(EMOJI_DICT.items())
+        for path in available[language]:
+            entries.extend((key, emoji, True) for key, emoji in load_emoji_source(path))
+    return EmojiMatcher(entries)
+
+@functools.lru_cache(maxsize=None)
+def _load_emoji_matcher(languages):
+    path = emoji_index_path(languages)
+    try:
+        return MappedEmojiMatcher(path)
+    except (OSError, ValueError):
+        pass
+    matcher = build_emoji_matcher(languages)
+    try:
+        os.makedirs(EMOJI_INDEX_DIR, exist_ok=True)
+        matcher.save(path)
+    except OSError:
+        # Нет прав на запись — работаем с автоматом в памяти
+        return matcher
+    return MappedEmojiMatcher(path)
+
+def get_emoji_matcher(languages=None):
+    """Автомат для языков (по умолчанию — из настроек).
+
+    Индекс строится один раз и кэшируется на диске; в процессе загружается
+    при первом использовании.
+    """
+    if languages:
+        return _load_emoji_matcher(parse_emoji_languages(languages))
     try:
-        choice = int(input(f"\n{theme['accent']}Выбор (1-{len(test_servers)}): {theme['text']}")) - 1
-        
-        if 0 <= choice < len(test_servers):
-            server = test_servers[choice]
-            printc(f"\nТестирование через {server['name']}...", "accent")
-            
-            # Тест скорости загрузки
-            printc("\n📥 Тестирование скорости загрузки...", "header")
-            
-            start_time = time.time()
-            try:
-                response = requests.get(server['url'], stream=True, timeout=10)
-                response.raise_for_status()
-                
-                total_size = 0
-                chunk_size = 1024 * 1024  # 1 MB
-                
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        total_size += len(chunk)
-                    elapsed = time.time() - start_time
-                    if elapsed > 0:
-                        speed = total_size / elapsed / 1024 / 1024  # MB/s
-                        print(f"\rСкачано: {total_size/1024/1024:.2f} MB | Скорость: {speed:.2f} MB/s", end="")
-                    
-                    if elapsed > 5:  # Тестируем 5 секунд
-                        break
-                
-                download_speed = total_size / elapsed / 1024 / 1024  # MB/s
-                printc(f"\n\n📥 Результат загрузки: {download_speed:.2f} MB/s", "success")
-                
-                # Оценка скорости
-                if download_speed > 50:
-                    rating = "Отлично! 🚀"
-                    color = "success"
-                elif download_speed > 20:
-                    rating = "Хорошо! 👍"
-                    color = "accent"
-                elif download_speed > 5:
-                    rating = "Нормально 👌"
-                    color = "text"
-                else:
-                    rating = "Медленно 🐢"
-                    color = "error"
-                
-                printc(f"Оценка: {rating}", color)
-                
-                # Примерная скорость в Мбит/с
-                mbps = download_speed * 8
-                printc(f"Примерно: {mbps:.0f} Мбит/с", "text")
-                
-                # Что можно делать с такой скоростью
-                printc(f"\n🎯 Возможности при такой скорости:", "header")
-                if mbps > 100:
-                    printc("• 4K видео поток", "success")
-                    printc("• Онлайн игры без лагов", "success")
-                    printc("• Быстрая загрузка файлов", "success")
-                elif mbps > 50:
-                    printc("• Full HD видео", "accent")
-                    printc("• Видеозвонки HD", "accent")
-                    printc("• Комфортный веб-сёрфинг", "accent")
-                elif mbps > 20:
-                    printc("• HD видео", "text")
-                    printc("• Аудио поток", "text")
-                    printc("• Работа с облаками", "text")
-                else:
-                    printc("• Базовый веб-сёрфинг", "error")
-                    printc("• Электронная почта", "error")
-                    printc("• Медленная загрузка", "error")
-                
-            except Exception as e:
-                printc(f"\n✗ Ошибка тестирования: {e}", "error")
-                
-                # Симуляция теста для демонстрации
-                printc("\nЗапуск демо-теста...", "accent")
-                download_speed = random.uniform(10, 100)
-                printc(f"Демо-скорость: {download_speed:.2f} MB/s", "success")
-        
-        else:
-            printc("Неверный выбор!", "error")
-    
+        languages = parse_emoji_languages(SETTINGS["emoji_languages"])
     except ValueError:
-        printc("Неверный ввод!", "error")
-    
-    wait_for_enter()
+        # Словарь из настроек удалён или переименован — остаётся встроенный
+        languages = ("ru",)
+    return _load_emoji_matcher(languages)
 
-# ==================== НОВЫЕ ФИШКИ ====================
+def emojify(text, matcher=None):
+    """Заменить слова, содержащие ключ словаря, на эмодзи. Возвращает (текст, замен)"""
+    matcher = matcher or get_emoji_matcher()
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Редкие символы меняют длину при смене регистра — работаем с нижним регистром
+        text = lowered
+    pieces = []
+    pos = 0
+    replaced = 0
+    for start, end, emoji in matcher.find(lowered):
+        if start < pos:
+            continue
+        # Ключ внутри слова заменяет слово целиком: «смайлик» -> 😊
+        while start > pos and text[start - 1].isalnum():
+            start -= 1
+        while end < len(text) and text[end].isalnum():
+            end += 1
+        pieces.append(text[pos:start])
+        pieces.append(emoji)
+        pos = end
+        replaced += 1
+    pieces.append(text[pos:])
+    return "".join(pieces), replaced
+
+def emojify_stream(src, dst, matcher=None):
+    """Построчное преобразование потока. Возвращает (строк, замен)"""
+    matcher = matcher or get_emoji_matcher()
+    lines = replaced = 0
+    for line in src:
+        converted, count = emojify(line, matcher)
+        dst.write(converted)
+        lines += 1
+        replaced += count
+    return lines, replaced
+
+def emoji_file_mode():
+    """Преобразование текстового файла построчно"""
+    src_path = input(f"{theme['accent']}Исходный файл: {theme['text']}").strip()
+    if not os.path.isfile(src_path):
+        printc("Файл не найден!", "error")
+        return
+    base, ext = os.path.splitext(src_path)
+    default_dst = f"{base}_emoji{ext or '.txt'}"
+    dst_path = input(f"{theme['accent']}Файл результата (Enter — {default_dst}): {theme['text']}").strip() or default_dst
+
+    start = time.perf_counter()
+    with open(src_path, 'r', encoding='utf-8', errors='replace') as src, \
+            open(dst_path, 'w', encoding='utf-8') as dst:
+        lines, replaced = emojify_stream(src, dst)
+    elapsed = time.perf_counter() - start
+
+    size = os.path.getsize(src_path)
+    printc(f"\n✓ Сохранено: {dst_path}", "success")
+    printc(f"Строк: {lines:,d} | замен: {replaced:,d} | {format_size(size)} за {elapsed:.2f} с "
+           f"({format_size(size / max(elapsed, 1e-9))}/s)", "text")
 
 def text_to_emoji():
     """Конвертер текста в эмодзи"""
     print_header("😊 КОНВЕРТЕР ТЕКСТА В ЭМОДЗИ")
     
-    text = input(f"{theme['accent']}Введите текст для преобразования:\n{theme['text']}")
+    text = input(f"{theme['accent']}Введите текст для преобразования (Enter — файл):\n{theme['text']}")
     
     if not text.strip():
-        printc("Текст не может быть пустым!", "error")
+        try:
+            emoji_file_mode()
+        except (OSError, ValueError) as e:
+            printc(f"\n✗ Ошибка: {e}", "error")
         wait_for_enter()
         return
     
-    # Словарь замен
-    emoji_dict = {
-        'смайл': '😊', 'улыбка': '😄', 'смех': '😂', 'подмиг': '😉',
-        'сердце': '❤️', 'любовь': '💖', 'звезда': '⭐', 'огонь': '🔥',
-        'молния': '⚡', 'снег': '❄️', 'солнце': '☀️', 'луна': '🌙',
-        'облако': '☁️', 'дождь': '🌧️', 'гроза': '⛈️', 'радуга': '🌈',
-        'кофе': '☕', 'чай': '🍵', 'пицца': '🍕', 'бургер': '🍔',
-        'торт': '🎂', 'мороженое': '🍦', 'пиво': '🍺', 'вино': '🍷',
-        'музыка': '🎵', 'гитара': '🎸', 'ноты': '🎶', 'фильм': '🎬',
-        'камера': '📷', 'телефон': '📱', 'компьютер': '💻', 'книга': '📚',
-        'письмо': '✉️', 'карандаш': '✏️', 'ключ': '🔑', 'часы': '⏰',
-        'деньги': '💰', 'банк': '🏦', 'машина': '🚗', 'самолет': '✈️',
-        'корабль': '🚢', 'поезд': '🚂', 'дом': '🏠', 'офис': '🏢',
-        'больница': '🏥', 'школа': '🏫', 'университет': '🎓', 'работа': '💼',
-        'спорт': '⚽', 'футбол': '⚽', 'баскетбол': '🏀', 'теннис': '🎾',
-        'плавание': '🏊', 'бег': '🏃', 'йога': '🧘', 'медитация': '🧘‍♂️',
-        'здоровье': '💪', 'болезнь': '🤒', 'доктор': '👨‍⚕️', 'медсестра': '👩‍⚕️',
-        'учитель': '👨‍🏫', 'студент': '👨‍🎓', 'программист': '👨‍💻', 'дизайнер': '👨‍🎨',
-        'хорошо': '👍', 'плохо': '👎', 'ок': '👌', 'привет': '👋',
-        'пока': '👋', 'спасибо': '🙏', 'пожалуйста': '🙏', 'извини': '😔',
-        'поздравляю': '🎉', 'день рождения': '🎂', 'новый год': '🎄',
-        'рождество': '🎅', 'халлоуин': '🎃', 'пасха': '🐰', 'отпуск': '🏖️',
-        'пляж': '🏖️', 'море': '🌊', 'горы': '⛰️', 'лес': '🌲',
-        'цветок': '🌸', 'дерево': '🌳', 'животное': '🐾', 'кошка': '🐱',
-        'собака': '🐶', 'птица': '🐦', 'рыба': '🐟', 'лев': '🦁',
-        'тигр': '🐯', 'медведь': '🐻', 'заяц': '🐰', 'волк': '🐺',
-        'сова': '🦉', 'дельфин': '🐬', 'кит': '🐋', 'акула': '🦈',
-        'змея': '🐍', 'ящерица': '🦎', 'паук': '🕷️', 'бабочка': '🦋',
-        'пчела': '🐝', 'муравей': '🐜', 'улитка': '🐌', 'червяк': '🐛'
-    }
-    
-    # Преобразование текста
-    words = text.lower().split()
-    result = []
-    
-    for word in words:
-        # Проверяем слово целиком
-        if word in emoji_dict:
-            result.append(emoji_dict[word])
-        else:
-            # Проверяем часть слова
-            found = False
-            for key, emoji in emoji_dict.items():
-                if key in word:
-                    result.append(emoji)
-                    found = True
-                    break
-            if not found:
-                result.append(word)
-    
-    converted = ' '.join(result)
+    try:
+        converted, _ = emojify(text)
+    except (OSError, ValueError) as e:
+        printc(f"\n✗ Ошибка: {e}", "error")
+        wait_for_enter()
+        return
     
     printc(f"\n🎭 Преобразованный текст:", "success")
     printc(converted, "accent")
@@ -780,18 +2857,7 @@ def file_info():
         printc(f"Полный путь: {os.path.abspath(filepath)}", "text")
         
         # Размер файла
-        size = stats.st_size
-        size_str = ""
-        if size < 1024:
-            size_str = f"{size} байт"
-        elif size < 1024 * 1024:
-            size_str = f"{size/1024:.2f} KB"
-        elif size < 1024 * 1024 * 1024:
-            size_str = f"{size/1024/1024:.2f} MB"
-        else:
-            size_str = f"{size/1024/1024/1024:.2f} GB"
-        
-        printc(f"Размер: {size_str}", "text")
+        printc(f"Размер: {format_size(stats.st_size)}", "text")
         
         # Даты
         printc(f"\n📅 ДАТЫ:", "header")
@@ -831,40 +2897,53 @@ def file_info():
             printc("Тип: Директория", "text")
         elif os.path.islink(filepath):
             printc("Тип: Символическая ссылка", "text")
-        
-        # Хеш файла
+
+        if os.path.isdir(filepath):
+            directory_checksum(filepath)
+            wait_for_enter()
+            return
+
+        # Хеш файла и статистика читаются за один проход
         printc(f"\n🔐 ХЕШ ФАЙЛА:", "header")
+        counter = None
         try:
-            with open(filepath, 'rb') as f:
-                content = f.read()
-                md5 = hashlib.md5(content).hexdigest()
-                sha256 = hashlib.sha256(content).hexdigest()
-                
-                printc(f"MD5: {md5}", "text")
-                printc(f"SHA-256: {sha256}", "text")
-                
-                if SETTINGS["autocopy"]:
-                    pyperclip.copy(sha256)
-                    printc("✓ SHA-256 скопирован в буфер", "success")
+            cache = get_hash_cache()
+            if cache is not None:
+                cache.reset_counters()
+
+            if stats.st_size >= RESUMABLE_MIN_SIZE and input(
+                    f"{theme['accent']}Большой файл: возобновляемый режим ({tree_hash_name()}, "
+                    f"контрольные точки)? (y/n): {theme['text']}").lower() == 'y':
+                digests = resumable_hash_interactive(filepath, cache)
+            else:
+                algorithms = parse_algorithms(input(
+                    f"{theme['accent']}Алгоритмы через запятую (Enter — MD5, SHA-256; all — все): {theme['text']}"))
+
+                counter = TextCounter()
+                digests = cached_hash_file(filepath, algorithms, progress=print_hash_progress,
+                                           cache=cache, counter=counter)
+                if cache is None or cache.misses:
+                    print()
+
+            for name, digest in (digests or {}).items():
+                printc(f"{name}: {digest}", "text")
+            print_cache_counters(cache)
+
+            if SETTINGS["autocopy"] and digests:
+                copied = "SHA-256" if "SHA-256" in digests else list(digests)[-1]
+                pyperclip.copy(digests[copied])
+                printc(f"✓ {copied} скопирован в буфер", "success")
         except Exception as e:
+            counter = None
             printc(f"Не удалось вычислить хеш: {e}", "error")
         
         # Дополнительная информация
         printc(f"\n📈 СТАТИСТИКА:", "header")
-        try:
-            if os.path.isfile(filepath):
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
-                    printc(f"Количество строк: {len(lines)}", "text")
-                    
-                    # Подсчет слов и символов
-                    text = ''.join(lines)
-                    words = len(text.split())
-                    chars = len(text)
-                    printc(f"Количество слов: {words:,d}", "text")
-                    printc(f"Количество символов: {chars:,d}", "text")
-        except:
-            pass
+        if counter is not None:
+            text_stats = counter.result()
+            printc(f"Количество строк: {text_stats['lines']}", "text")
+            printc(f"Количество слов: {text_stats['words']:,d}", "text")
+            printc(f"Количество символов: {text_stats['chars']:,d}", "text")
         
     except Exception as e:
         printc(f"Ошибка: {e}", "error")
@@ -873,14 +2952,136 @@ def file_info():
 
 # ==================== БАЗОВЫЕ ФУНКЦИИ ====================
 
+# Блок кодирования кратен 3 (без промежуточного '=') и 57 (ровно 76 символов в строке MIME)
+BASE64_CHUNK_SIZE = 57 * 16384
+BASE64_VARIANTS = ("standard", "urlsafe", "mime")
+_BASE64_WHITESPACE = b" \t\r\n\v\f"
+_BASE64_ALPHABET = (string.ascii_letters + string.digits + "+/=").encode()
+_BASE64_TO_URLSAFE = bytes.maketrans(b"+/", b"-_")
+_BASE64_FROM_URLSAFE = bytes.maketrans(b"-_", b"+/")
+
+def _read_aligned(src, carry, size, align):
+    """Дочитать блок и отрезать часть, кратную align; остаток возвращается отдельно"""
+    data = carry + (src.read(size) or b"")
+    cut = len(data) // align * align
+    return data, cut
+
+def base64_encode_stream(src, dst, variant="standard", progress=None, total=0,
+                         chunk_size=BASE64_CHUNK_SIZE):
+    """Потоковое кодирование src -> dst (бинарные потоки). Возвращает (прочитано, записано)"""
+    align = 57 if variant == "mime" else 3
+    done = written = 0
+    carry = b""
+    start = last_report = time.perf_counter()
+
+    while True:
+        data, cut = _read_aligned(src, carry, chunk_size, align)
+        eof = len(data) == len(carry)
+        if eof:
+            cut = len(data)
+        block, carry = data[:cut], data[cut:]
+
+        if block:
+            if variant == "mime":
+                encoded = base64.encodebytes(block)
+            else:
+                encoded = binascii.b2a_base64(block, newline=False)
+                if variant == "urlsafe":
+                    encoded = encoded.translate(_BASE64_TO_URLSAFE)
+            dst.write(encoded)
+            done += len(block)
+            written += len(encoded)
+
+        if progress:
+            now = time.perf_counter()
+            if eof or now - last_report >= 0.25:
+                progress(done, total, now - start)
+                last_report = now
+        if eof:
+            return done, written
+
+def base64_decode_stream(src, dst, variant="standard", progress=None, total=0,
+                         chunk_size=BASE64_CHUNK_SIZE):
+    """Потоковое декодирование src -> dst. Пробелы и переводы строк игнорируются,
+    для urlsafe допускается отсутствие '=' в конце"""
+    done = written = 0
+    carry = b""
+    start = last_report = time.perf_counter()
+
+    while True:
+        raw = src.read(chunk_size) or b""
+        eof = not raw
+        done += len(raw)
+        data = carry + raw.translate(None, _BASE64_WHITESPACE)
+        if variant == "urlsafe":
+            data = data.translate(_BASE64_FROM_URLSAFE)
+
+        if eof:
+            block, carry = data + b"=" * (-len(data) % 4), b""
+        else:
+            cut = len(data) // 4 * 4
+            block, carry = data[:cut], data[cut:]
+
+        if block:
+            # translate с удалением алфавита оставляет только недопустимые байты
+            if block.translate(None, _BASE64_ALPHABET):
+                raise binascii.Error("Недопустимые символы в Base64")
+            decoded = binascii.a2b_base64(block)
+            dst.write(decoded)
+            written += len(decoded)
+
+        if progress:
+            now = time.perf_counter()
+            if eof or now - last_report >= 0.25:
+                progress(done, total, now - start)
+                last_report = now
+        if eof:
+            return done, written
+
+def base64_file_mode():
+    """Потоковое кодирование/декодирование файлов"""
+    printc("\nРежим файла:", "header")
+    printc("1. Кодировать файл в Base64", "text")
+    printc("2. Декодировать файл из Base64", "text")
+    choice = input(f"{theme['accent']}Выбор: {theme['text']}")
+    if choice not in ('1', '2'):
+        printc("Неверный выбор!", "error")
+        return
+
+    printc("\nВариант: 1. Стандартный  2. URL-safe  3. MIME (строки по 76 символов)", "header")
+    variant = {'2': "urlsafe", '3': "mime"}.get(input(f"{theme['accent']}Выбор (Enter — 1): {theme['text']}"), "standard")
+
+    src_path = input(f"{theme['accent']}Исходный файл: {theme['text']}").strip()
+    if not os.path.isfile(src_path):
+        printc("Файл не найден!", "error")
+        return
+    default_dst = src_path + ".b64" if choice == '1' else os.path.splitext(src_path)[0] + ".bin"
+    dst_path = input(f"{theme['accent']}Файл результата (Enter — {default_dst}): {theme['text']}").strip() or default_dst
+
+    convert = base64_encode_stream if choice == '1' else base64_decode_stream
+    start = time.perf_counter()
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        done, written = convert(src, dst, variant, progress=print_hash_progress,
+                                total=os.fstat(src.fileno()).st_size)
+    elapsed = time.perf_counter() - start
+    print()
+
+    printc(f"\n✓ Сохранено: {dst_path}", "success")
+    printc(f"Прочитано: {format_size(done)} | Записано: {format_size(written)}", "text")
+    if elapsed > 0:
+        printc(f"Скорость: {format_size(done / elapsed)}/s", "text")
+
 def base64_tool():
     """Base64 кодирование/декодирование"""
     print_header("BASE64 КОДИРОВАНИЕ/ДЕКОДИРОВАНИЕ")
     
-    text = input(f"{theme['accent']}Введите текст для кодирования/декодирования:\n{theme['text']}")
+    text = input(f"{theme['accent']}Введите текст для кодирования/декодирования (Enter — работа с файлом):\n{theme['text']}")
     
     if not text.strip():
-        printc("Текст не может быть пустым!", "error")
+        try:
+            base64_file_mode()
+        except (OSError, ValueError) as e:
+            printc(f"\n✗ Ошибка: {e}", "error")
         wait_for_enter()
         return
     
@@ -913,30 +3114,96 @@ def base64_tool():
     
     wait_for_enter()
 
+# hashlib отпускает GIL только на буферах от 2048 байт: потоки имеют смысл для длинных записей
+HASHLIB_GIL_THRESHOLD = 2048
+
+def hash_records(records, algorithms, output_format="tsv"):
+    """Пакет записей (bytes) -> (текст вывода, записей, байт).
+
+    TSV: дайджесты, затем сама запись последним полем; JSON Lines: объект на запись.
+    """
+    constructors = [(name, HASH_ALGORITHMS[name]) for name in algorithms]
+    lines = []
+    if output_format == "jsonl":
+        keys = [name.lower().replace('-', '') for name in algorithms]
+        for record in records:
+            item = {"record": record.decode('utf-8', 'replace')}
+            for key, (_, algo) in zip(keys, constructors):
+                item[key] = algo(record).hexdigest()
+            lines.append(json.dumps(item, ensure_ascii=False))
+    else:
+        for record in records:
+            digests = [algo(record).hexdigest() for _, algo in constructors]
+            digests.append(record.decode('utf-8', 'replace'))
+            lines.append('\t'.join(digests))
+    lines.append('')
+    return '\n'.join(lines), len(records), sum(len(record) for record in records)
+
+def hash_bulk(src, dst, algorithms=("SHA-256",), output_format="tsv", workers=None):
+    """Хеширование построчных записей бинарного потока src в текстовый поток dst.
+
+    workers=None — пул потоков, только если записи длинные (hashlib отпускает GIL).
+    Возвращает (записей, байт, секунд).
+    """
+    batches = iter_line_batches(src)
+    first = next(batches, None)
+    if first is None:
+        return 0, 0, 0.0
+
+    if workers is None:
+        average = sum(len(record) for record in first) / len(first)
+        workers = (os.cpu_count() or 1) if average >= HASHLIB_GIL_THRESHOLD else 1
+
+    def all_batches():
+        yield first
+        yield from batches
+
+    records = nbytes = 0
+    start = time.perf_counter()
+    for text, count, size in map_batches(hash_records, all_batches(), workers,
+                                         args=(algorithms, output_format)):
+        dst.write(text)
+        records += count
+        nbytes += size
+    return records, nbytes, time.perf_counter() - start
+
+def hash_bulk_mode():
+    """Пакетный режим генератора хешей: файл записей -> TSV/JSON Lines"""
+    src_path = input(f"{theme['accent']}Файл с записями (по одной на строку): {theme['text']}").strip()
+    if not os.path.isfile(src_path):
+        printc("Файл не найден!", "error")
+        return
+
+    algorithms = parse_algorithms(input(
+        f"{theme['accent']}Алгоритмы через запятую (Enter — SHA-256; all — все): {theme['text']}"), ("SHA-256",))
+    output_format = "jsonl" if input(
+        f"{theme['accent']}Формат: 1. TSV  2. JSON Lines (Enter — 1): {theme['text']}") == '2' else "tsv"
+    default_dst = f"{os.path.splitext(src_path)[0]}_hashes.{output_format}"
+    dst_path = input(f"{theme['accent']}Файл результата (Enter — {default_dst}): {theme['text']}").strip() or default_dst
+
+    printc("\nХеширование...", "accent")
+    with open(src_path, 'rb') as src, open(dst_path, 'w', encoding='utf-8', newline='\n') as dst:
+        records, nbytes, elapsed = hash_bulk(src, dst, algorithms, output_format)
+
+    printc(f"\n✓ Сохранено: {dst_path}", "success")
+    printc(format_throughput(records, nbytes, elapsed), "text")
+
 def hash_generator():
     """Генератор хешей"""
     print_header("🔑 ГЕНЕРАТОР ХЕШЕЙ")
     
-    text = input(f"{theme['accent']}Введите текст для хеширования:\n{theme['text']}")
+    text = input(f"{theme['accent']}Введите текст для хеширования (Enter — пакетный режим из файла):\n{theme['text']}")
     
     if not text.strip():
-        printc("Текст не может быть пустым!", "error")
+        try:
+            hash_bulk_mode()
+        except (OSError, ValueError) as e:
+            printc(f"\n✗ Ошибка: {e}", "error")
         wait_for_enter()
         return
     
-    algorithms = [
-        ("MD5", hashlib.md5),
-        ("SHA-1", hashlib.sha1),
-        ("SHA-256", hashlib.sha256),
-        ("SHA-512", hashlib.sha512),
-        ("SHA3-256", hashlib.sha3_256),
-        ("SHA3-512", hashlib.sha3_512),
-        ("BLAKE2b", hashlib.blake2b),
-        ("BLAKE2s", hashlib.blake2s)
-    ]
-    
     printc("\nРезультаты хеширования:", "header")
-    for name, algo in algorithms:
+    for name, algo in HASH_ALGORITHMS.items():
         try:
             hash_obj = algo(text.encode())
             result = hash_obj.hexdigest()
@@ -951,33 +3218,240 @@ def hash_generator():
     
     wait_for_enter()
 
+QR_ERROR_LEVELS = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+QR_BOX_SIZE = 10
+QR_BATCH_ROWS = 64
+QR_CACHE_SIZE = 1024
+QR_BATCH_TEMPLATE = "qr_{n:05d}"
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+def make_qr(text, error_correction="L"):
+    """QR-код минимальной версии, вмещающей текст"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=QR_ERROR_LEVELS[error_correction],
+        box_size=2,
+        border=4,
+    )
+    qr.add_data(text)
+    qr.make(fit=True)
+    return qr
+
+@functools.lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_matrix(data, error_correction="L"):
+    """Матрица QR-кода (кортеж строк); повторные данные не кодируются заново"""
+    return tuple(tuple(row) for row in make_qr(data, error_correction).get_matrix())
+
+def qr_png_bytes(matrix, box_size=QR_BOX_SIZE):
+    """Чёрно-белый PNG (1 бит на пиксель) из матрицы без PIL"""
+    size = len(matrix) * box_size
+    padding = "1" * (-size % 8)
+    # Клетка -> box_size бит: 0 — чёрный, 1 — белый
+    scale = str.maketrans({"0": "0" * box_size, "1": "1" * box_size})
+    raw = bytearray()
+    for row in matrix:
+        bits = "".join(["0" if cell else "1" for cell in row]).translate(scale) + padding
+        raw += (b"\0" + int(bits, 2).to_bytes(len(bits) // 8, 'big')) * box_size
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 1, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(bytes(raw), 9))
+            + chunk(b"IEND", b""))
+
+def qr_svg(matrix, box_size=QR_BOX_SIZE):
+    """SVG из матрицы: один path, тёмные клетки строки слиты в прямоугольники"""
+    size = len(matrix)
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        for dark, run in itertools.groupby(row):
+            width = len(list(run))
+            if dark:
+                path.append(f"M{x},{y}h{width}v1h-{width}z")
+            x += width
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+            f'width="{size * box_size}" height="{size * box_size}" shape-rendering="crispEdges">'
+            f'<rect width="{size}" height="{size}" fill="#fff"/>'
+            f'<path fill="#000" d="{"".join(path)}"/></svg>\n')
+
+def qr_filename(template, fields, ext):
+    """Имя файла по шаблону ({n}, {data} и колонки CSV) без недопустимых символов"""
+    name = _UNSAFE_FILENAME_RE.sub("_", template.format(**fields)).strip() or f"qr_{fields['n']:05d}"
+    return name + ext
+
+# Ошибки str.format для шаблона имени: нет поля, {0}, {data.x}, неверный формат
+QR_TEMPLATE_ERRORS = (KeyError, IndexError, AttributeError, ValueError)
+
+def describe_qr_template_error(error):
+    if isinstance(error, KeyError):
+        return f"нет поля {error} для шаблона имени"
+    return f"неверный шаблон имени: {error}"
+
+def check_qr_template(template, fields):
+    """Пробное форматирование шаблона по полям первой строки; ошибка — ValueError"""
+    try:
+        template.format(**fields)
+    except QR_TEMPLATE_ERRORS as e:
+        raise ValueError(describe_qr_template_error(e)) from None
+
+def iter_qr_jobs(rows, template, ext, errors):
+    """(номер, имя файла, данные) с уникальными именами: повтор получает суффикс _{n}.
+
+    Имена назначаются в основном процессе, поэтому они уникальны во всём
+    пакете, а не только в пакете воркера. Регистр не учитывается (Windows, macOS).
+    """
+    used = set()
+    for fields, data in rows:
+        n = fields["n"]
+        try:
+            name = qr_filename(template, fields, ext)
+        except QR_TEMPLATE_ERRORS as e:
+            errors.append((n, describe_qr_template_error(e)))
+            continue
+        while name.lower() in used:
+            name = f"{name[:-len(ext)]}_{n}{ext}"
+        used.add(name.lower())
+        yield n, name, data
+
+def iter_qr_rows(path, column=None):
+    """Строки пакета: (поля для шаблона, данные). CSV — с заголовком, иначе строка = данные"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.csv'):
+            reader = csv.DictReader(f)
+            if not reader.fieldnames:
+                return
+            column = column or reader.fieldnames[0]
+            if column not in reader.fieldnames:
+                raise ValueError(f"нет колонки {column!r}, есть: {', '.join(reader.fieldnames)}")
+            for n, row in enumerate(reader, 1):
+                yield {**row, "n": n, "data": row[column]}, row[column]
+        else:
+            n = 0
+            for line in f:
+                line = line.rstrip('\r\n')
+                if line:
+                    n += 1
+                    yield {"n": n, "data": line}, line
+
+def _render_qr_batch(jobs, out_dir, fmt, error_correction, box_size):
+    """Воркер: отрисовать пакет (номер, имя, данные) в файлы. Возвращает (кодов, байт, ошибки)"""
+    count = nbytes = 0
+    errors = []
+    for n, name, data in jobs:
+        try:
+            matrix = qr_matrix(data, error_correction)
+            content = qr_png_bytes(matrix, box_size) if fmt == "png" else qr_svg(matrix, box_size).encode()
+            with open(os.path.join(out_dir, name), 'wb') as f:
+                f.write(content)
+            count += 1
+            nbytes += len(content)
+        except (OSError, ValueError) as e:
+            errors.append((n, str(e)))
+    return count, nbytes, errors
+
+def qr_batch(path, out_dir, fmt="png", template=QR_BATCH_TEMPLATE, column=None,
+             error_correction="L", box_size=QR_BOX_SIZE, workers=None, progress=None):
+    """Пакетная генерация QR-кодов по процессам. Возвращает (кодов, байт, ошибки).
+
+    Неверный шаблон имени — ValueError до записи первого файла.
+    """
+    rows = iter_qr_rows(path, column)
+    first = next(rows, None)
+    if first is None:
+        return 0, 0, []
+    check_qr_template(template, first[0])
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    count = nbytes = 0
+    errors = []
+    jobs = iter_qr_jobs(itertools.chain([first], rows), template, "." + fmt, errors)
+    batches = iter(lambda: list(itertools.islice(jobs, QR_BATCH_ROWS)), [])
+    executor_class = functools.partial(ProcessPoolExecutor, initializer=_ignore_sigint)
+    start = time.perf_counter()
+    for done, size, failed in map_batches(_render_qr_batch, batches, workers, executor_class,
+                                          args=(out_dir, fmt, error_correction, box_size)):
+        count += done
+        nbytes += size
+        errors.extend(failed)
+        if progress:
+            progress(count, time.perf_counter() - start)
+    return count, nbytes, errors
+
+def print_qr_progress(count, elapsed):
+    """Строка прогресса пакетной генерации"""
+    rate = count / elapsed if elapsed > 0 else 0
+    print(f"\r{theme['accent']}Кодов: {count:,d} | {rate:,.0f} кодов/с   ", end="")
+
+def qr_batch_mode():
+    """Пакетная генерация QR-кодов из CSV или списка строк"""
+    path = input(f"{theme['accent']}Файл со строками или CSV: {theme['text']}").strip()
+    if not os.path.isfile(path):
+        printc("Файл не найден!", "error")
+        return
+    column = None
+    if path.lower().endswith('.csv'):
+        column = input(f"{theme['accent']}Колонка с данными (Enter — первая): {theme['text']}").strip() or None
+    out_dir = input(f"{theme['accent']}Папка для кодов (Enter — qr_codes): {theme['text']}").strip() or "qr_codes"
+    fmt = input(f"{theme['accent']}Формат png/svg (Enter — png): {theme['text']}").strip().lower() or "png"
+    if fmt not in ("png", "svg"):
+        printc("Неверный формат!", "error")
+        return
+    template = input(f"{theme['accent']}Шаблон имени, поля {{n}}, {{data}} и колонки CSV "
+                     f"(Enter — {QR_BATCH_TEMPLATE}): {theme['text']}").strip() or QR_BATCH_TEMPLATE
+
+    start = time.perf_counter()
+    count, nbytes, errors = qr_batch(path, out_dir, fmt, template, column, progress=print_qr_progress)
+    elapsed = time.perf_counter() - start
+    print()
+
+    printc(f"\n✓ Сохранено в {out_dir}", "success")
+    printc(f"Кодов: {count:,d} | {format_size(nbytes)} за {elapsed:.2f} с | "
+           f"{count / max(elapsed, 1e-9):,.0f} кодов/с", "text")
+    for n, error in errors[:10]:
+        printc(f"  ✗ строка {n}: {error}", "error")
+    if len(errors) > 10:
+        printc(f"  ... и ещё {len(errors) - 10}", "error")
+
+# Пара клеток (верхняя, нижняя) -> символ полублока
+QR_HALF_BLOCKS = {(False, False): " ", (True, False): "▀", (False, True): "▄", (True, True): "█"}
+
+def render_qr_halfblock(matrix):
+    """Текст QR-кода полублоками: две строки матрицы на строку терминала"""
+    rows = list(matrix)
+    if len(rows) % 2:
+        rows.append((False,) * len(rows[0]))
+    blocks = QR_HALF_BLOCKS.__getitem__
+    return "\n".join("".join(map(blocks, zip(top, bottom))) for top, bottom in zip(rows[::2], rows[1::2]))
+
 def qr_generator():
     """Генератор QR-кодов"""
     print_header("📱 ГЕНЕРАТОР QR-КОДОВ")
     
-    text = input(f"{theme['accent']}Введите текст или URL для QR-кода:\n{theme['text']}")
+    text = input(f"{theme['accent']}Введите текст или URL для QR-кода (Enter — пакет из файла):\n{theme['text']}")
     
     if not text.strip():
-        printc("Текст не может быть пустым!", "error")
+        try:
+            qr_batch_mode()
+        except (OSError, ValueError) as e:
+            printc(f"\n✗ Ошибка: {e}", "error")
         wait_for_enter()
         return
     
     try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=2,
-            border=4,
-        )
-        qr.add_data(text)
-        qr.make(fit=True)
+        matrix = qr_matrix(text)
         
         printc("\n✓ QR-код создан (ASCII представление):", "success")
         
-        matrix = qr.get_matrix()
-        for row in matrix:
-            line = ''.join(['██' if cell else '  ' for cell in row])
-            printc(line, "text")
+        sys.stdout.write(f"{theme['text']}{render_qr_halfblock(matrix)}{Style.RESET_ALL}\n")
+        sys.stdout.flush()
         
         printc(f"\nИнформация:", "header")
         printc(f"Размер: {len(matrix)}x{len(matrix)}", "text")
@@ -986,8 +3460,8 @@ def qr_generator():
         save = input(f"\n{theme['accent']}Сохранить как PNG? (y/n): {theme['text']}").lower()
         if save == 'y':
             filename = f"qr_{int(time.time())}.png"
-            img = qr.make_image(fill_color="black", back_color="white")
-            img.save(filename)
+            with open(filename, 'wb') as f:
+                f.write(qr_png_bytes(matrix))
             printc(f"✓ Сохранено как {filename}", "success")
         
     except Exception as e:
@@ -995,6 +3469,95 @@ def qr_generator():
     
     wait_for_enter()
 
+URL_ACTIONS = ("quote", "quote_plus", "unquote", "unquote_plus", "parse")
+# Пакетов из файла больше одного — вход большой, стоит поднимать процессы
+URL_PARALLEL_MIN_BATCHES = 2
+
+def parse_url(text):
+    """URL в словарь полей; параметры запроса — списки значений"""
+    try:
+        parts = urlsplit(text)
+        return {
+            "url": text,
+            "scheme": parts.scheme,
+            "host": parts.hostname,
+            "port": parts.port,
+            "path": parts.path,
+            "query": parse_qs(parts.query, keep_blank_values=True),
+            "fragment": parts.fragment,
+        }
+    except ValueError as e:
+        return {"url": text, "error": str(e)}
+
+def url_records(records, action, safe=None):
+    """Пакет записей (bytes) -> (текст вывода, записей, байт). parse — JSON Lines.
+
+    safe=None — как в urllib: "/" для quote, пусто для quote_plus.
+    quote/quote_plus кодируют исходные байты, поэтому вход не в UTF-8
+    (Latin-1, двоичные данные) не теряется.
+    """
+    if action == "quote":
+        lines = [quote_from_bytes(record, safe="/" if safe is None else safe) for record in records]
+    elif action == "quote_plus":
+        lines = [quote_plus(record, safe="" if safe is None else safe) for record in records]
+    else:
+        texts = [record.decode('utf-8', 'replace') for record in records]
+        if action == "parse":
+            lines = [json.dumps(parse_url(text), ensure_ascii=False) for text in texts]
+        elif action == "unquote":
+            lines = [unquote(text) for text in texts]
+        else:
+            lines = [unquote_plus(text) for text in texts]
+    lines.append('')
+    return '\n'.join(lines), len(records), sum(len(record) for record in records)
+
+def url_bulk(src, dst, action, safe=None, workers=None):
+    """Построчная обработка URL из бинарного потока src в текстовый dst.
+
+    workers=None — пул процессов, только если вход больше одного пакета.
+    Возвращает (записей, байт, секунд).
+    """
+    batches = iter_line_batches(src)
+    head = list(itertools.islice(batches, URL_PARALLEL_MIN_BATCHES))
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(head) >= URL_PARALLEL_MIN_BATCHES else 1
+
+    executor_class = functools.partial(ProcessPoolExecutor, initializer=_ignore_sigint)
+    records = nbytes = 0
+    start = time.perf_counter()
+    for text, count, size in map_batches(url_records, itertools.chain(head, batches), workers,
+                                         executor_class, args=(action, safe)):
+        dst.write(text)
+        records += count
+        nbytes += size
+    return records, nbytes, time.perf_counter() - start
+
+def url_bulk_mode():
+    """Пакетная обработка файла URL"""
+    printc("\nДействие:", "header")
+    for i, action in enumerate(URL_ACTIONS, 1):
+        printc(f"{i}. {action}{' (JSON Lines)' if action == 'parse' else ''}", "text")
+    choice = input(f"{theme['accent']}Выбор: {theme['text']}").strip()
+    if not choice.isdigit() or not 1 <= int(choice) <= len(URL_ACTIONS):
+        printc("Неверный выбор!", "error")
+        return
+    action = URL_ACTIONS[int(choice) - 1]
+
+    src_path = input(f"{theme['accent']}Файл с URL (по одному на строку): {theme['text']}").strip()
+    if not os.path.isfile(src_path):
+        printc("Файл не найден!", "error")
+        return
+    ext = "jsonl" if action == "parse" else "txt"
+    default_dst = f"{os.path.splitext(src_path)[0]}_{action}.{ext}"
+    dst_path = input(f"{theme['accent']}Файл результата (Enter — {default_dst}): {theme['text']}").strip() or default_dst
+
+    printc("\nОбработка...", "accent")
+    with open(src_path, 'rb') as src, open(dst_path, 'w', encoding='utf-8', newline='\n') as dst:
+        records, nbytes, elapsed = url_bulk(src, dst, action)
+
+    printc(f"\n✓ Сохранено: {dst_path}", "success")
+    printc(format_throughput(records, nbytes, elapsed), "text")
+
 def url_tools():
     """Инструменты для работы с URL"""
     print_header("🌐 URL ИНСТРУМЕНТЫ")
@@ -1002,10 +3565,17 @@ def url_tools():
     printc("Выберите действие:", "header")
     printc("1. URL encode", "text")
     printc("2. URL decode", "text")
+    printc("3. Пакетная обработка файла (quote, unquote, разбор в JSON Lines)", "text")
     
     choice = input(f"\n{theme['accent']}Выбор: {theme['text']}")
     
-    if choice == '1':
+    if choice == '3':
+        try:
+            url_bulk_mode()
+        except OSError as e:
+            printc(f"\n✗ Ошибка: {e}", "error")
+    
+    elif choice == '1':
         text = input(f"{theme['accent']}Введите текст для кодирования:\n{theme['text']}")
         encoded = quote(text)
         printc(f"\n✓ Закодированный URL:", "success")
@@ -1026,6 +3596,166 @@ def url_tools():
     
     wait_for_enter()
 
+PASSWORD_CHARSETS = {
+    "alnum": string.ascii_letters + string.digits,
+    "full": string.ascii_letters + string.digits + "!@#$%^&*()-_=+[]{}|;:,.<>?",
+    "letters": string.ascii_letters,
+    "digits": string.digits
+}
+
+# Пункты меню генератора паролей -> набор символов
+PASSWORD_CHOICES = {'1': "alnum", '2': "full", '3': "letters", '4': "digits"}
+PASSWORD_BLOCK_SIZE = 64 * 1024
+# Сколько паролей или токенов собирается в памяти перед записью
+SECRETS_CHUNK = 10000
+SECRET_KINDS = ("password", "hex", "urlsafe", "uuid4", "uuid7")
+TOKEN_BYTES = 32
+
+class PasswordSampler:
+    """Несмещённые символы алфавита из блоков os.urandom.
+
+    Байт принимается, только если он меньше наибольшего кратного размеру
+    алфавита (отбраковка), и отображается в символ остатком от деления.
+    Отбор и отображение делает bytes.translate — без вызова Python на символ.
+    """
+
+    def __init__(self, chars, block_size=PASSWORD_BLOCK_SIZE):
+        chars = "".join(dict.fromkeys(chars))
+        if not 1 <= len(chars) <= 256:
+            raise ValueError("в наборе должно быть от 1 до 256 различных символов")
+        size = len(chars)
+        limit = 256 - 256 % size
+        self.block_size = block_size
+        self.delete = bytes(range(limit, 256))
+        if chars.isascii():
+            self.table = bytes(ord(chars[byte % size]) if byte < limit else 0 for byte in range(256))
+            self.symbols = None
+        else:
+            # Сначала индекс символа, затем str.translate в сам символ
+            self.table = bytes(byte % size if byte < limit else 0 for byte in range(256))
+            self.symbols = dict(enumerate(chars))
+        self.buffer = ""
+        self.pos = 0
+
+    def take(self, count):
+        """count случайных символов"""
+        while len(self.buffer) - self.pos < count:
+            block = os.urandom(max(self.block_size, count * 2)).translate(self.table, self.delete)
+            text = block.decode('latin-1')
+            if self.symbols is not None:
+                text = text.translate(self.symbols)
+            self.buffer = self.buffer[self.pos:] + text
+            self.pos = 0
+        result = self.buffer[self.pos:self.pos + count]
+        self.pos += count
+        return result
+
+@functools.lru_cache(maxsize=16)
+def get_password_sampler(chars):
+    return PasswordSampler(chars)
+
+def generate_password(length, chars):
+    """Пароль из криптостойкого генератора"""
+    if len(set(chars)) > 256:
+        return ''.join(secrets.choice(chars) for _ in range(length))
+    return get_password_sampler(chars).take(length)
+
+def iter_uuid7(count):
+    """UUIDv7 (RFC 9562) пакетами: миллисекунды Unix и 12-битный счётчик в rand_a,
+    поэтому значения строго возрастают"""
+    last_ms = counter = 0
+    for start in range(0, count, SECRETS_CHUNK):
+        size = min(SECRETS_CHUNK, count - start)
+        block = os.urandom(size * 8)
+        now = time.time_ns() // 1_000_000
+        if now > last_ms:
+            last_ms = now
+            counter = int.from_bytes(os.urandom(2), 'big') & 0x7FF
+        chunk = []
+        for i in range(size):
+            if counter > 0xFFF:
+                last_ms += 1
+                counter = 0
+            rand_b = int.from_bytes(block[i * 8:i * 8 + 8], 'big') & ((1 << 62) - 1)
+            value = last_ms << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+            chunk.append(str(uuid.UUID(int=value)))
+            counter += 1
+        yield chunk
+
+def iter_secrets(kind, count, length=None, chars=PASSWORD_CHARSETS["alnum"]):
+    """Пароли или токены пакетами по SECRETS_CHUNK.
+
+    length — символов для password, байт случайности для hex и urlsafe.
+    """
+    if count < 1:
+        raise ValueError("количество должно быть не меньше 1")
+    if length is not None and length < 1:
+        raise ValueError("длина должна быть не меньше 1")
+    if kind == "uuid7":
+        yield from iter_uuid7(count)
+        return
+    for start in range(0, count, SECRETS_CHUNK):
+        size = min(SECRETS_CHUNK, count - start)
+        if kind == "password":
+            length = 16 if length is None else length
+            if len(set(chars)) > 256:
+                yield [generate_password(length, chars) for _ in range(size)]
+                continue
+            text = get_password_sampler(chars).take(size * length)
+            yield [text[i:i + length] for i in range(0, len(text), length)]
+            continue
+
+        nbytes = 16 if kind == "uuid4" else TOKEN_BYTES if length is None else length
+        block = os.urandom(size * nbytes)
+        if kind == "hex":
+            text = block.hex()
+            step = nbytes * 2
+            yield [text[i:i + step] for i in range(0, len(text), step)]
+        elif kind == "urlsafe":
+            encode = base64.urlsafe_b64encode
+            yield [encode(block[i:i + nbytes]).rstrip(b"=").decode() for i in range(0, len(block), nbytes)]
+        elif kind == "uuid4":
+            yield [str(uuid.UUID(bytes=block[i:i + 16], version=4)) for i in range(0, len(block), 16)]
+        else:
+            raise ValueError(f"неизвестный вид: {kind}")
+
+def write_secrets(dst, kind, count, length=None, chars=PASSWORD_CHARSETS["alnum"]):
+    """Записать count паролей или токенов построчно. Возвращает (байт, секунд)"""
+    nbytes = 0
+    start = time.perf_counter()
+    for chunk in iter_secrets(kind, count, length, chars):
+        chunk.append("")
+        text = "\n".join(chunk)
+        dst.write(text)
+        nbytes += len(text) if text.isascii() else len(text.encode())
+    return nbytes, time.perf_counter() - start
+
+def password_bulk_mode(length, chars):
+    """Пакетная генерация паролей и токенов в файл"""
+    printc("\nЧто генерировать:", "header")
+    printc(f"1. Пароли ({length} символов из выбранного набора)", "text")
+    printc(f"2. hex-токены ({TOKEN_BYTES} байт)", "text")
+    printc(f"3. urlsafe-токены ({TOKEN_BYTES} байт)", "text")
+    printc("4. UUID v4", "text")
+    printc("5. UUID v7 (упорядоченные по времени)", "text")
+    choice = input(f"{theme['accent']}Выбор: {theme['text']}").strip()
+    if choice not in ('1', '2', '3', '4', '5'):
+        printc("Неверный выбор!", "error")
+        return
+    kind = SECRET_KINDS[int(choice) - 1]
+    count = int(input(f"{theme['accent']}Количество: {theme['text']}"))
+    if count <= 0:
+        printc("Количество должно быть больше нуля!", "error")
+        return
+    default_dst = f"{kind}s.txt"
+    dst_path = input(f"{theme['accent']}Файл результата (Enter — {default_dst}): {theme['text']}").strip() or default_dst
+
+    with open(dst_path, 'w', encoding='utf-8', newline='\n') as dst:
+        nbytes, elapsed = write_secrets(dst, kind, count, length if kind == "password" else None, chars)
+
+    printc(f"\n✓ Сохранено: {dst_path}", "success")
+    printc(format_throughput(count, nbytes, elapsed), "text")
+
 def password_generator():
     """Генератор безопасных паролей"""
     print_header("🔐 ГЕНЕРАТОР ПАРОЛЕЙ")
@@ -1043,25 +3773,20 @@ def password_generator():
         
         choice = input(f"\n{theme['accent']}Выбор: {theme['text']}")
         
-        if choice == '1':
-            chars = string.ascii_letters + string.digits
-        elif choice == '2':
-            chars = string.ascii_letters + string.digits + "!@#$%^&*()-_=+[]{}|;:,.<>?"
-        elif choice == '3':
-            chars = string.ascii_letters
-        elif choice == '4':
-            chars = string.digits
-        elif choice == '5':
+        if choice == '5':
             custom = input(f"{theme['accent']}Введите свои символы: {theme['text']}")
-            chars = custom if custom else string.ascii_letters + string.digits
+            chars = custom if custom else PASSWORD_CHARSETS['alnum']
         else:
-            chars = string.ascii_letters + string.digits
+            chars = PASSWORD_CHARSETS.get(PASSWORD_CHOICES.get(choice), PASSWORD_CHARSETS['alnum'])
         
-        # Генерация пароля
-        printc("\nГенерация...", "accent")
-        time.sleep(0.5)
+        bulk = input(f"{theme['accent']}Пакетная генерация в файл (пароли, токены, UUID)? (y/n): {theme['text']}").lower()
+        if bulk == 'y':
+            password_bulk_mode(length, chars)
+            wait_for_enter()
+            return
         
-        password = ''.join(secrets.choice(chars) for _ in range(length))
+        # Генерация пароля
+        password = generate_password(length, chars)
         
         printc(f"\n✅ Сгенерирован пароль:", "success")
         printc(f"{password}", "accent")
@@ -1100,54 +3825,1140 @@ def password_generator():
         # Генерация нескольких вариантов
         printc(f"\n{theme['header']}Дополнительные варианты:", "header")
         for i in range(3):
-            alt_password = ''.join(secrets.choice(chars) for _ in range(length))
+            alt_password = generate_password(length, chars)
             printc(f"{i+1}. {alt_password}", "text")
         
-    except ValueError:
-        printc("Неверный формат длины!", "error")
+    except ValueError as e:
+        printc(f"Неверный формат: {e}", "error")
+    except OSError as e:
+        printc(f"\n✗ Ошибка: {e}", "error")
     
     wait_for_enter()
 
+TEXT_CHUNK_SIZE = 1024 * 1024
+# Сколько частых n-грамм хранит TextStats: память не растёт с размером текста
+TEXT_NGRAM_CAPACITY = 10000
+# Слово — последовательность букв и цифр
+_WORD_RE = re.compile(r"[^\W_]+")
+SENTENCE_ENDINGS = ".!?"
+SCRIPT_NAMES = {
+    "LATIN": "латиница", "CYRILLIC": "кириллица", "GREEK": "греческий",
+    "ARABIC": "арабский", "HEBREW": "иврит", "CJK": "иероглифы",
+    "HIRAGANA": "хирагана", "KATAKANA": "катакана", "HANGUL": "хангыль",
+    "DEVANAGARI": "деванагари", "ARMENIAN": "армянский", "GEORGIAN": "грузинский",
+}
+
+@functools.lru_cache(maxsize=None)
+def get_numpy():
+    """numpy, если установлен"""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+def count_chars(counter, text):
+    """Добавить частоты символов text в counter (bincount по кодам, если есть numpy)"""
+    np = get_numpy()
+    if np is None or len(text) < 65536:
+        counter.update(text)
+        return
+    counts = np.bincount(np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32))
+    for code in np.flatnonzero(counts).tolist():
+        counter[chr(code)] += int(counts[code])
+
+def iter_text_chunks(stream, chunk_size=TEXT_CHUNK_SIZE):
+    """Фрагменты текстового потока, разрезанные по пробельным символам, чтобы не рвать слова"""
+    carry = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            if carry:
+                yield carry
+            return
+        chunk = carry + chunk
+        cut = max(chunk.rfind(" "), chunk.rfind("\n"))
+        if cut < 0 and len(chunk) < chunk_size * 16:
+            carry = chunk
+            continue
+        carry = chunk[cut + 1:] if cut >= 0 else ""
+        yield chunk[:cut + 1] if cut >= 0 else chunk
+
+def letter_script(char):
+    """Письменность буквы по имени Unicode (LATIN, CYRILLIC, ...)"""
+    name = unicodedata.name(char, "")
+    if not name:
+        return "UNKNOWN"
+    return name.split(" ", 1)[0]
+
+class TextStats:
+    """Статистика текста за один проход по фрагментам.
+
+    Символы считаются целиком на уровне C (Counter или numpy.bincount),
+    слова — через split() и Counter, регулярное выражение разбирает только
+    различные токены.
+    N-граммы не рвутся на границе фрагментов; точные частоты копятся
+    пачкой и сворачиваются в SpaceSaving, поэтому их память ограничена.
+    """
+
+    def __init__(self, ngram=2, ngram_capacity=TEXT_NGRAM_CAPACITY):
+        self.ngram = ngram
+        self.chars = Counter()
+        self.words = Counter()
+        self.ngrams = Counter()
+        self.top_ngrams = SpaceSaving(ngram_capacity)
+        self.tail = []
+        self.last = ""
+
+    def update(self, text):
+        if not text:
+            return
+        count_chars(self.chars, text)
+        self.last = text[-1]
+        # Регулярное выражение применяется к различным токенам, а не ко всему тексту
+        tokens = text.lower().split()
+        token_counts = Counter(tokens)
+        token_words = {token: _WORD_RE.findall(token) for token in token_counts}
+        for token, count in token_counts.items():
+            for word in token_words[token]:
+                self.words[word] += count
+        if self.ngram > 1 and tokens:
+            sequence = self.tail + list(itertools.chain.from_iterable(map(token_words.__getitem__, tokens)))
+            self.ngrams.update(zip(*(sequence[i:] for i in range(self.ngram))))
+            self.tail = sequence[-(self.ngram - 1):]
+            if len(self.ngrams) > self.top_ngrams.capacity * 8:
+                self.fold_ngrams()
+
+    def fold_ngrams(self):
+        """Перенести точные частоты n-грамм в сводку частых"""
+        if self.ngrams:
+            self.top_ngrams.add_counts(self.ngrams)
+            self.ngrams = Counter()
+
+    @property
+    def length(self):
+        return sum(self.chars.values())
+
+    @property
+    def lines(self):
+        if not self.chars:
+            return 0
+        return self.chars["\n"] + (self.last != "\n")
+
+    @property
+    def sentences(self):
+        return sum(self.chars[char] for char in SENTENCE_ENDINGS)
+
+    def letters(self):
+        """Частоты букв без учёта регистра"""
+        letters = Counter()
+        for char, count in self.chars.items():
+            if char.isalpha():
+                letters[char.lower()] += count
+        return letters
+
+    def alphabets(self):
+        """{письменность: {"letters": букв всего, "distinct": различных букв}}"""
+        scripts = {}
+        for char, count in self.letters().items():
+            info = scripts.setdefault(letter_script(char), {"letters": 0, "distinct": 0})
+            info["letters"] += count
+            info["distinct"] += 1
+        return dict(sorted(scripts.items(), key=lambda item: -item[1]["letters"]))
+
+    def summary(self, top=10):
+        """Итоги для вывода и JSON"""
+        words = sum(self.words.values())
+        self.fold_ngrams()
+        return {
+            "length": self.length,
+            "lines": self.lines,
+            "words": words,
+            "unique_words": len(self.words),
+            "sentences": self.sentences,
+            "avg_word_length": (sum(len(word) * count for word, count in self.words.items()) / words
+                                if words else 0),
+            "top_letters": dict(self.letters().most_common(top)),
+            "top_words": dict(self.words.most_common(top)),
+            "top_ngrams": {" ".join(gram): count for gram, count in self.top_ngrams.most_common(top)},
+            "top_ngrams_error": self.top_ngrams.floor,
+            "alphabets": self.alphabets(),
+        }
+
+def analyze_text_stream(stream, ngram=2, chunk_size=TEXT_CHUNK_SIZE):
+    """TextStats по текстовому потоку без чтения его целиком"""
+    stats = TextStats(ngram)
+    for chunk in iter_text_chunks(stream, chunk_size):
+        stats.update(chunk)
+    return stats
+
+# Сколько частых слов хранит сводка корпуса
+CORPUS_TOP_CAPACITY = 10000
+
+class SpaceSaving:
+    """Частые элементы не больше чем в capacity счётчиках (алгоритм Space-Saving).
+
+    Оценки частот завышены не больше чем на floor. Сводки объединяются:
+    отсутствующему в одной из них элементу приписывается её floor.
+    """
+
+    def __init__(self, capacity=CORPUS_TOP_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+
+    @property
+    def floor(self):
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def _merge_counts(self, counts, floor):
+        own_floor = self.floor
+        merged = Counter({item: count + counts.get(item, floor) for item, count in self.counts.items()})
+        for item, count in counts.items():
+            if item not in merged:
+                merged[item] = count + own_floor
+        if len(merged) > self.capacity:
+            merged = dict(merged.most_common(self.capacity))
+        self.counts = merged
+
+    def add_counts(self, counts):
+        """Добавить точные частоты (Counter)"""
+        self._merge_counts(counts, 0)
+
+    def merge(self, other):
+        self._merge_counts(other.counts, other.floor)
+
+    def most_common(self, n):
+        return Counter(self.counts).most_common(n)
+
+class CorpusStats(TextStats):
+    """Объединяемая статистика корпуса файлов.
+
+    Частоты символов и длин слов точные, частые слова хранятся в SpaceSaving,
+    поэтому память воркера и размер его результата не растут со словарём.
+    """
+
+    def __init__(self, capacity=CORPUS_TOP_CAPACITY):
+        super().__init__(ngram=1)
+        self.top_words = SpaceSaving(capacity)
+        self.word_lengths = Counter()
+        self.word_total = 0
+        self.line_count = 0
+        self.files = 0
+        self.bytes = 0
+        self.errors = []
+
+    def update(self, text):
+        super().update(text)
+        if len(self.words) > self.top_words.capacity * 8:
+            self.fold_words()
+
+    def fold_words(self):
+        """Перенести точные частоты слов в длины слов и сводку частых"""
+        if not self.words:
+            return
+        for word, count in self.words.items():
+            self.word_lengths[len(word)] += count
+        self.word_total += sum(self.words.values())
+        self.top_words.add_counts(self.words)
+        self.words = Counter()
+
+    def add_file(self, path, chunk_size=TEXT_CHUNK_SIZE):
+        newlines = self.chars["\n"]
+        self.last = ""
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for chunk in iter_text_chunks(f, chunk_size):
+                self.update(chunk)
+        if self.last:
+            self.line_count += self.chars["\n"] - newlines + (self.last != "\n")
+        self.files += 1
+        self.bytes += os.path.getsize(path)
+
+    @property
+    def lines(self):
+        return self.line_count
+
+    def merge(self, other):
+        self.fold_words()
+        other.fold_words()
+        self.chars.update(other.chars)
+        self.word_lengths.update(other.word_lengths)
+        self.top_words.merge(other.top_words)
+        self.word_total += other.word_total
+        self.line_count += other.line_count
+        self.files += other.files
+        self.bytes += other.bytes
+        self.errors.extend(other.errors)
+
+    def summary(self, top=10):
+        self.fold_words()
+        words = self.word_total
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "length": self.length,
+            "lines": self.lines,
+            "words": words,
+            "sentences": self.sentences,
+            "avg_word_length": (sum(length * count for length, count in self.word_lengths.items()) / words
+                                if words else 0),
+            "top_letters": dict(self.letters().most_common(top)),
+            "top_words": dict(self.top_words.most_common(top)),
+            "top_words_error": self.top_words.floor,
+            "word_lengths": dict(sorted(self.word_lengths.items())),
+            "alphabets": self.alphabets(),
+            "errors": self.errors,
+        }
+
+def _analyze_corpus_files(paths, capacity):
+    """Воркер: статистика группы файлов, уже объединённая"""
+    stats = CorpusStats(capacity)
+    for path in paths:
+        try:
+            stats.add_file(path)
+        except OSError as e:
+            stats.errors.append((path, str(e)))
+    stats.fold_words()
+    return stats
+
+def is_corpus_pattern(path):
+    """Директория или шаблон с *, ? или [ — анализировать как корпус"""
+    return os.path.isdir(path) or any(char in path for char in "*?[")
+
+def corpus_files(pattern):
+    """Файлы корпуса: все файлы директории или совпадения шаблона (** — рекурсивно)"""
+    if os.path.isdir(pattern):
+        return sorted(path for path, _ in walk_files(pattern))
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+def analyze_corpus(files, workers=None, capacity=CORPUS_TOP_CAPACITY, progress=None):
+    """Map-reduce по процессам: группы файлов анализируются параллельно и объединяются"""
+    workers = min(workers or os.cpu_count() or 1, max(1, len(files)))
+    # Группы помельче, чтобы процессы загружались равномерно
+    group = max(1, min(64, len(files) // (workers * 8)))
+    groups = [files[i:i + group] for i in range(0, len(files), group)]
+    total = CorpusStats(capacity)
+    start = last_report = time.perf_counter()
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint)
+        parts = executor.map(_analyze_corpus_files, groups, itertools.repeat(capacity))
+    else:
+        executor = None
+        parts = (_analyze_corpus_files(paths, capacity) for paths in groups)
+
+    try:
+        for part in parts:
+            total.merge(part)
+            if progress:
+                now = time.perf_counter()
+                if now - last_report >= 0.25:
+                    progress(total.files + len(total.errors), len(files), total.bytes, now - start)
+                    last_report = now
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    if progress:
+        progress(total.files + len(total.errors), len(files), total.bytes, time.perf_counter() - start)
+    return total
+
+def print_corpus_progress(done, total, nbytes, elapsed):
+    """Строка прогресса анализа корпуса"""
+    speed = nbytes / elapsed if elapsed > 0 else 0
+    print(f"\r{theme['accent']}Файлов: {done:,d}/{total:,d} | {format_size(nbytes)} | "
+          f"{format_size(speed)}/s   ", end="")
+
+def print_text_stats(summary):
+    """Вывод результатов анализа текста"""
+    length = summary["length"]
+    printc(f"Длина текста: {length:,d} символов", "text")
+    printc(f"Количество строк: {summary['lines']:,d}", "text")
+    if "unique_words" in summary:
+        printc(f"Количество слов: {summary['words']:,d} (уникальных: {summary['unique_words']:,d})", "text")
+    else:
+        printc(f"Количество слов: {summary['words']:,d}", "text")
+    printc(f"Количество предложений: {summary['sentences']:,d}", "text")
+    if summary["words"]:
+        printc(f"Средняя длина слова: {summary['avg_word_length']:.1f} символов", "text")
+
+    if summary["alphabets"]:
+        printc(f"\n🔤 Алфавиты:", "header")
+        for script, info in summary["alphabets"].items():
+            name = SCRIPT_NAMES.get(script, script.title())
+            printc(f"  {name}: {info['letters']:,d} букв, различных {info['distinct']}", "accent")
+
+    printc(f"\n📈 Частота символов (топ-{len(summary['top_letters'])}):", "header")
+    for char, count in summary["top_letters"].items():
+        percentage = (count / length * 100) if length > 0 else 0
+        bar_length = int(percentage / 2)
+        bar = "█" * bar_length + "░" * (50 - bar_length)
+        printc(f"  {char}: {count:3} ({percentage:5.1f}%) {bar}", "accent")
+
+    if summary.get("word_lengths"):
+        printc(f"\n📏 Длины слов:", "header")
+        peak = max(summary["word_lengths"].values())
+        for length, count in summary["word_lengths"].items():
+            if length > 20:
+                break
+            bar_length = int(count / peak * 40)
+            printc(f"  {length:2}: {'█' * bar_length}{'░' * (40 - bar_length)} {count:,d}", "accent")
+
+    if summary["top_words"]:
+        error = summary.get("top_words_error")
+        printc(f"\n📝 Частые слова{f' (оценка, погрешность до {error:,d})' if error else ''}:", "header")
+        for word, count in summary["top_words"].items():
+            printc(f"  {word}: {count:,d}", "accent")
+    if summary.get("top_ngrams"):
+        error = summary.get("top_ngrams_error")
+        printc(f"\n🔗 Частые сочетания слов{f' (оценка, погрешность до {error:,d})' if error else ''}:", "header")
+        for gram, count in summary["top_ngrams"].items():
+            printc(f"  {gram}: {count:,d}", "accent")
+
+def text_file_mode():
+    """Анализ текстового файла по фрагментам (директория или шаблон — корпус)"""
+    path = input(f"{theme['accent']}Путь к файлу, директории или шаблон (*.txt, **/*.md): {theme['text']}").strip()
+    if is_corpus_pattern(path):
+        text_corpus_mode(path)
+        return
+    if not os.path.isfile(path):
+        printc("Файл не найден!", "error")
+        return
+
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        stats = analyze_text_stream(f)
+    elapsed = time.perf_counter() - start
+
+    printc("\n📊 Результаты анализа:", "header")
+    print_text_stats(stats.summary())
+    size = os.path.getsize(path)
+    printc(f"\n{format_size(size)} за {elapsed:.2f} с ({format_size(size / max(elapsed, 1e-9))}/s)", "text")
+
+def text_corpus_mode(pattern):
+    """Анализ корпуса: директория или шаблон файлов, по процессам"""
+    files = corpus_files(pattern)
+    if not files:
+        printc("Файлы не найдены!", "error")
+        return
+
+    start = time.perf_counter()
+    stats = analyze_corpus(files, progress=print_corpus_progress)
+    elapsed = time.perf_counter() - start
+    print()
+
+    summary = stats.summary()
+    printc("\n📊 Результаты анализа корпуса:", "header")
+    printc(f"Файлов: {summary['files']:,d} ({format_size(summary['bytes'])})", "text")
+    print_text_stats(summary)
+    for path, error in summary["errors"][:10]:
+        printc(f"  ✗ {path}: {error}", "error")
+    printc(f"\n{format_size(summary['bytes'])} за {elapsed:.2f} с "
+           f"({format_size(summary['bytes'] / max(elapsed, 1e-9))}/s, процессов: "
+           f"{min(os.cpu_count() or 1, len(files))})", "text")
+
 def text_analyzer():
     """Анализатор текста"""
     print_header("📊 АНАЛИЗАТОР ТЕКСТА")
     
-    text = input(f"{theme['accent']}Введите текст для анализа:\n{theme['text']}")
+    text = input(f"{theme['accent']}Введите текст для анализа (Enter — анализ файла):\n{theme['text']}")
     
     if not text.strip():
-        printc("Текст не может быть пустым!", "error")
+        try:
+            text_file_mode()
+        except OSError as e:
+            printc(f"\n✗ Ошибка: {e}", "error")
         wait_for_enter()
         return
     
     printc("\n📊 Результаты анализа:", "header")
-    
-    # Базовая статистика
-    length = len(text)
-    words = text.split()
-    sentences = text.count('.') + text.count('!') + text.count('?')
-    
-    printc(f"Длина текста: {length} символов", "text")
-    printc(f"Количество слов: {len(words)}", "text")
-    printc(f"Количество предложений: {sentences}", "text")
-    if words:
-        printc(f"Средняя длина слова: {sum(len(w) for w in words)/len(words):.1f} символов", "text")
-    
-    # Частота символов
-    printc(f"\n📈 Частота символов (топ-10):", "header")
-    char_count = {}
-    for char in text.lower():
-        if char.isalpha():
-            char_count[char] = char_count.get(char, 0) + 1
-    
-    sorted_chars = sorted(char_count.items(), key=lambda x: x[1], reverse=True)[:10]
-    for char, count in sorted_chars:
-        percentage = (count / length * 100) if length > 0 else 0
-        bar_length = int(percentage / 2)
-        bar = "█" * bar_length + "░" * (50 - bar_length)
-        printc(f"  {char}: {count:3} ({percentage:5.1f}%) {bar}", "accent")
+    stats = TextStats()
+    stats.update(text)
+    print_text_stats(stats.summary())
     
     wait_for_enter()
 
+JSON_READ_SIZE = 256 * 1024
+JSON_WRITE_SIZE = 64 * 1024
+
+# Один токен JSON после пробелов; незавершённый у края буфера токен дочитывается
+_JSON_TOKEN_RE = re.compile(r'''[ \t\n\r]*(
+    [{}\[\]:,]
+  | "(?:[^"\\\x00-\x1f]|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}))*"
+  | NaN|-?Infinity
+  | -?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?
+  | true|false|null
+)''', re.VERBOSE)
+_JSON_SPACE_RE = re.compile(r'[ \t\n\r]*')
+# Допустимое начало токена, обрезанное краем буфера
+_JSON_PARTIAL_RE = re.compile(r'''[ \t\n\r]*(?:
+    "(?:[^"\\\x00-\x1f]|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{0,4})?)*
+  | -?[0-9]*(?:\.[0-9]*)?(?:[eE][+-]?[0-9]*)?
+  | t(?:r(?:ue?)?)? | f(?:a(?:l(?:se?)?)?)? | n(?:u(?:ll?)?)?
+  | N(?:aN?)? | -?I(?:n(?:f(?:i(?:n(?:i(?:ty?)?)?)?)?)?)?
+)''', re.VERBOSE)
+# Сообщение json.JSONDecodeError для неожиданного символа или конца в каждом состоянии разбора
+_JSON_EXPECTING = {
+    "value": "Expecting value",
+    "value_or_end": "Expecting value",
+    "key": "Expecting property name enclosed in double quotes",
+    "key_or_end": "Expecting property name enclosed in double quotes",
+    "colon": "Expecting ':' delimiter",
+    "comma_or_end": "Expecting ',' delimiter",
+    "done": "Extra data",
+}
+
+class JsonStreamError(ValueError):
+    """Ошибка разбора потокового JSON с позицией как у json.JSONDecodeError"""
+
+    def __init__(self, msg, lineno, colno):
+        super().__init__(f"{msg}: строка {lineno}, столбец {colno}")
+        self.msg = msg
+        self.lineno = lineno
+        self.colno = colno
+
+class JsonEventReader:
+    """Потоковый разбор JSON в события без построения дерева.
+
+    События: ("start_map", "{"), ("key", '"имя"'), ("value", токен),
+    ("end_map", "}"), ("start_array", "["), ("end_array", "]").
+    Значения и ключи отдаются исходным текстом токена, память ограничена
+    глубиной вложенности и длиной самого длинного токена.
+    Принимает то же, что json.loads (включая NaN и Infinity), а ошибки
+    сообщает тем же текстом и в той же строке и столбце.
+    """
+
+    def __init__(self, stream, read_size=JSON_READ_SIZE):
+        self.stream = stream
+        self.read_size = read_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        # Позиция начала буфера: номер строки и столбец (с 1)
+        self._line = 1
+        self._col = 1
+        self._last = None
+        # Позиция символа, с которого не начинается ни один токен
+        self._bad = None
+
+    def _refill(self):
+        """Отбросить разобранную часть буфера и дочитать поток"""
+        consumed = self.buffer[:self.pos]
+        newlines = consumed.count('\n')
+        if newlines:
+            self._line += newlines
+            self._col = len(consumed) - consumed.rfind('\n')
+        else:
+            self._col += len(consumed)
+        chunk = self.stream.read(self.read_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def location(self, index):
+        """(строка, столбец) символа текущего буфера"""
+        newlines = self.buffer.count('\n', 0, index)
+        if newlines:
+            return self._line + newlines, index - self.buffer.rfind('\n', 0, index)
+        return self._line, self._col + index
+
+    def error(self, msg, index=None):
+        """JsonStreamError в позиции index, по умолчанию у последнего токена"""
+        if index is None:
+            last = self._last
+            index = last.start(1) if last is not None and last.string is self.buffer else len(self.buffer)
+        return JsonStreamError(msg, *self.location(index))
+
+    def tokens(self):
+        """Исходные токены JSON по порядку; "" — недопустимый символ в позиции self._bad"""
+        while True:
+            buffer = self.buffer
+            limit = len(buffer) - 2
+            match = None
+            # Быстрый путь: scanner продолжает с конца предыдущего совпадения
+            for match in iter(_JSON_TOKEN_RE.scanner(buffer, self.pos).match, None):
+                if match.end() >= limit:
+                    break
+                self._last = match
+                yield match.group(1)
+            else:
+                match = None
+            if self._last is not None and self._last.string is buffer:
+                self.pos = self._last.end()
+
+            # Токен у края буфера может быть обрезан (в т.ч. число вида "12." или "1e"):
+            # если остаток буфера — начало токена, дочитываем и повторяем
+            if not self.eof and _JSON_PARTIAL_RE.fullmatch(buffer, self.pos):
+                self._refill()
+                continue
+            if match is not None:
+                self._last = match
+                self.pos = match.end()
+                yield match.group(1)
+                continue
+
+            space = _JSON_SPACE_RE.match(buffer, self.pos).end()
+            self.pos = space
+            if space == len(buffer):
+                return
+            # Что ожидалось на этом месте, решает разбор грамматики
+            self._bad = space
+            yield ""
+            return
+
+    def unexpected(self, expect, index):
+        """Ошибка в позиции index, где ожидалось expect — как у json.loads"""
+        if expect in ("value", "value_or_end", "key", "key_or_end") and self.buffer.startswith('"', index):
+            # Строка не совпала с шаблоном: точную причину даёт сканер json
+            try:
+                json.decoder.scanstring(self.buffer, index + 1)
+            except json.JSONDecodeError as e:
+                return self.error(e.msg, e.pos)
+        return self.error(_JSON_EXPECTING[expect], index)
+
+    def __iter__(self):
+        stack = []
+        expect = "value"
+        for token in self.tokens():
+            if not token:
+                raise self.unexpected(expect, self._bad)
+            first = token[0]
+            if expect == "value" or expect == "value_or_end":
+                if first == '{':
+                    stack.append('{')
+                    expect = "key_or_end"
+                    yield "start_map", token
+                    continue
+                if first == '[':
+                    stack.append('[')
+                    expect = "value_or_end"
+                    yield "start_array", token
+                    continue
+                if first == ']' and expect == "value_or_end":
+                    stack.pop()
+                    yield "end_array", token
+                elif first in '{}[]:,':
+                    raise self.error("Expecting value")
+                else:
+                    yield "value", token
+            elif expect == "key" or expect == "key_or_end":
+                if first == '"':
+                    expect = "colon"
+                    yield "key", token
+                    continue
+                if first == '}' and expect == "key_or_end":
+                    stack.pop()
+                    yield "end_map", token
+                else:
+                    raise self.error("Expecting property name enclosed in double quotes")
+            elif expect == "colon":
+                if first != ':':
+                    raise self.error("Expecting ':' delimiter")
+                expect = "value"
+                continue
+            elif expect == "comma_or_end":
+                if first == ',':
+                    expect = "key" if stack[-1] == '{' else "value"
+                    continue
+                if first == '}' and stack[-1] == '{':
+                    stack.pop()
+                    yield "end_map", token
+                elif first == ']' and stack[-1] == '[':
+                    stack.pop()
+                    yield "end_array", token
+                else:
+                    raise self.error("Expecting ',' delimiter")
+            else:
+                raise self.error("Extra data")
+
+            # Значение (скалярное или закрытый контейнер) завершено
+            expect = "comma_or_end" if stack else "done"
+
+        if expect != "done":
+            raise self.unexpected(expect, len(self.buffer))
+
+def write_json_stream(src, dst, indent=2, minify=False):
+    """Потоковое форматирование/минификация JSON из src в dst (текстовые потоки).
+
+    Токены переписываются как есть, поэтому экранирование строк и запись
+    чисел сохраняются. Возвращает число событий.
+    """
+    newline_indent = ["\n"]
+    pieces = []
+    size = 0
+    depth = 0
+    has_items = []
+    after_key = False
+    events = 0
+    write = dst.write
+    separator = ":" if minify else ": "
+
+    for event, token in JsonEventReader(src):
+        events += 1
+        if event == "end_map" or event == "end_array":
+            depth -= 1
+            if has_items.pop() and not minify:
+                pieces.append(newline_indent[depth])
+            pieces.append(token)
+        else:
+            if after_key:
+                after_key = False
+            elif has_items:
+                # Новый элемент контейнера: запятая и перенос с отступом
+                if has_items[-1]:
+                    pieces.append(",")
+                has_items[-1] = True
+                if not minify:
+                    while len(newline_indent) <= depth:
+                        newline_indent.append("\n" + " " * (indent * len(newline_indent)))
+                    pieces.append(newline_indent[depth])
+
+            pieces.append(token)
+            if event == "key":
+                pieces.append(separator)
+                after_key = True
+            elif event == "start_map" or event == "start_array":
+                has_items.append(False)
+                depth += 1
+
+        size += len(token)
+        if size >= JSON_WRITE_SIZE:
+            write("".join(pieces))
+            pieces.clear()
+            size = 0
+
+    pieces.append("\n")
+    write("".join(pieces))
+    return events
+
+def write_json_lines(src, dst, indent=None, minify=True):
+    """JSON Lines: каждая строка разбирается и выводится отдельно. Возвращает число записей"""
+    separators = (',', ':') if minify else None
+    records = 0
+    for lineno, line in enumerate(src, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise JsonStreamError(e.msg, lineno, e.colno)
+        dst.write(json.dumps(data, ensure_ascii=False, indent=None if minify else indent,
+                             separators=separators))
+        dst.write("\n")
+        records += 1
+    return records
+
+def json_stream_mode():
+    """Потоковая обработка JSON-файла или JSON Lines"""
+    printc("\nПотоковый режим:", "header")
+    printc("1. Форматировать большой JSON", "text")
+    printc("2. Минифицировать большой JSON", "text")
+    printc("3. JSON Lines: нормализовать построчно", "text")
+    choice = input(f"{theme['accent']}Выбор: {theme['text']}")
+    if choice not in ('1', '2', '3'):
+        printc("Неверный выбор!", "error")
+        return
+
+    src_path = input(f"{theme['accent']}Исходный файл: {theme['text']}").strip()
+    if not os.path.isfile(src_path):
+        printc("Файл не найден!", "error")
+        return
+    base, ext = os.path.splitext(src_path)
+    default_dst = f"{base}_{'pretty' if choice == '1' else 'min'}{ext or '.json'}"
+    dst_path = input(f"{theme['accent']}Файл результата (Enter — {default_dst}): {theme['text']}").strip() or default_dst
+
+    start = time.perf_counter()
+    with open(src_path, 'r', encoding='utf-8') as src, open(dst_path, 'w', encoding='utf-8') as dst:
+        if choice == '3':
+            count = write_json_lines(src, dst)
+            label = "Записей"
+        else:
+            count = write_json_stream(src, dst, minify=choice == '2')
+            label = "Токенов"
+    elapsed = time.perf_counter() - start
+
+    size = os.path.getsize(src_path)
+    printc(f"\n✓ Сохранено: {dst_path}", "success")
+    printc(f"{label}: {count:,d} | {format_size(size)} за {elapsed:.2f} с "
+           f"({format_size(size / max(elapsed, 1e-9))}/s)", "text")
+
+# Файлы больше этого размера проверяются потоково, без загрузки в память
+JSON_STREAM_VALIDATE_SIZE = 256 * 1024 * 1024
+
+@functools.lru_cache(maxsize=None)
+def get_json_backend():
+    """Самый быстрый доступный парсер JSON: (имя, loads). orjson/ujson — если установлены"""
+    try:
+        import orjson
+        return "orjson", orjson.loads
+    except ImportError:
+        pass
+    try:
+        import ujson
+        return "ujson", ujson.loads
+    except ImportError:
+        pass
+    return "json", json.loads
+
+def parse_json(data):
+    """Разбор JSON (str или bytes) быстрым парсером.
+
+    При ошибке разбор повторяется стандартным json: он либо даёт
+    JSONDecodeError с точной строкой и столбцом, либо принимает то, что
+    быстрый парсер не поддерживает (NaN, целые больше 64 бит).
+    """
+    name, loads = get_json_backend()
+    try:
+        return loads(data)
+    except ValueError:
+        if name == "json":
+            raise
+        return json.loads(data)
+
+def validate_json_file(path):
+    """Проверка одного файла без форматирования.
+
+    Возвращает словарь: path, valid, root (тип корня), backend, error
+    ((строка, столбец, сообщение) или None), size, elapsed.
+    """
+    start = time.perf_counter()
+    result = {"path": path, "valid": False, "root": None, "backend": None, "error": None, "size": 0}
+    try:
+        result["size"] = os.path.getsize(path)
+        if result["size"] >= JSON_STREAM_VALIDATE_SIZE:
+            result["backend"] = "stream"
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                first = None
+                for event, _ in JsonEventReader(f):
+                    first = first or event
+            result["root"] = {"start_map": "dict", "start_array": "list"}.get(first, "scalar")
+        else:
+            result["backend"] = get_json_backend()[0]
+            with open(path, 'rb') as f:
+                data = f.read()
+            result["root"] = type(parse_json(data)).__name__
+        result["valid"] = True
+    except (json.JSONDecodeError, JsonStreamError) as e:
+        result["error"] = (e.lineno, e.colno, e.msg)
+    except (OSError, ValueError) as e:
+        result["error"] = (0, 0, str(e))
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+def validate_json_tree(root, workers=None, progress=None, extensions=('.json',)):
+    """Параллельная проверка всех .json в директории: список результатов по путям"""
+    files = sorted(path for path, _ in walk_files(root) if path.lower().endswith(extensions))
+    workers = min(workers or os.cpu_count() or 1, max(1, len(files)))
+    start = last_report = time.perf_counter()
+    results = []
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint)
+        outcomes = executor.map(validate_json_file, files,
+                                chunksize=max(1, min(32, len(files) // (workers * 8))))
+    else:
+        executor = None
+        outcomes = map(validate_json_file, files)
+
+    try:
+        for result in outcomes:
+            results.append(result)
+            if progress:
+                now = time.perf_counter()
+                if now - last_report >= 0.25:
+                    progress(len(results), len(files), now - start)
+                    last_report = now
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    if progress:
+        progress(len(results), len(files), time.perf_counter() - start)
+    return results
+
+def print_validation_progress(done, total, elapsed):
+    """Строка прогресса проверки файлов"""
+    rate = done / elapsed if elapsed > 0 else 0
+    print(f"\r{theme['accent']}Проверено: {done:,d}/{total:,d} | {rate:,.0f} файлов/с   ", end="")
+
+def json_validate_mode():
+    """Проверка JSON-файла или директории с точным местом ошибки"""
+    path = input(f"{theme['accent']}Путь к файлу или директории: {theme['text']}").strip()
+    if not os.path.exists(path):
+        printc("Файл не найден!", "error")
+        return
+
+    if os.path.isfile(path):
+        result = validate_json_file(path)
+        if result["valid"]:
+            printc(f"\n✅ JSON корректен! ({result['root']}, {format_size(result['size'])}, "
+                   f"{result['elapsed']:.3f} с, парсер: {result['backend']})", "success")
+        else:
+            lineno, colno, msg = result["error"]
+            printc(f"\n✗ Ошибка в JSON:", "error")
+            printc(f"Строка {lineno}, столбец {colno}: {msg}", "error")
+        return
+
+    start = time.perf_counter()
+    results = validate_json_tree(path, progress=print_validation_progress)
+    elapsed = time.perf_counter() - start
+    print()
+
+    invalid = [result for result in results if not result["valid"]]
+    total_size = sum(result["size"] for result in results)
+    printc(f"\nПарсер: {get_json_backend()[0]}", "header")
+    printc(f"Файлов: {len(results):,d} ({format_size(total_size)}) за {elapsed:.2f} с", "text")
+    printc(f"✓ Корректных: {len(results) - len(invalid):,d}", "success")
+    printc(f"{'✗' if invalid else '✓'} С ошибками: {len(invalid):,d}", "error" if invalid else "text")
+    for result in invalid[:20]:
+        lineno, colno, msg = result["error"]
+        printc(f"    {_relative_path(result['path'], path)}:{lineno}:{colno}: {msg}", "accent")
+    if len(invalid) > 20:
+        printc(f"    ... и ещё {len(invalid) - 20}", "text")
+
+# Разбор выражения пути: $, .key, ['key'], [n], [*], .*, ..key
+_JSON_PATH_RE = re.compile(r"""
+    \.\.(?P<deep>[^.\[\]]+|\*)
+  | \.(?P<key>[^.\[\]]+)
+  | \[\s*(?P<index>\d+)\s*\]
+  | \[\s*(?P<star>\*)\s*\]
+  | \[\s*(?P<quote>['"])(?P<qkey>(?:\\.|(?!(?P=quote)).)*)(?P=quote)\s*\]
+""", re.VERBOSE)
+
+# Не больше стольких путей в сводке: память ограничена даже для «широких» документов
+JSON_SUMMARY_MAX_PATHS = 10000
+
+def parse_json_path(expression):
+    """Выражение вида $.items[*].id в список шагов (вид, значение)"""
+    expression = expression.strip()
+    if not expression.startswith('$'):
+        raise ValueError("путь должен начинаться с $")
+    steps = []
+    pos = 1
+    while pos < len(expression):
+        match = _JSON_PATH_RE.match(expression, pos)
+        if not match:
+            raise ValueError(f"неверный путь около позиции {pos + 1}: {expression[pos:pos + 20]}")
+        if match.group('deep') is not None:
+            name = match.group('deep')
+            steps.append(("deep", None if name == '*' else name))
+        elif match.group('key') is not None:
+            name = match.group('key')
+            steps.append(("any", None) if name == '*' else ("key", name))
+        elif match.group('index') is not None:
+            steps.append(("index", int(match.group('index'))))
+        elif match.group('star') is not None:
+            steps.append(("any", None))
+        else:
+            steps.append(("key", re.sub(r"\\(.)", r"\1", match.group('qkey'))))
+        pos = match.end()
+    return steps
+
+def _json_path_matches(steps, path, i=0, j=0):
+    """Совпадает ли конкретный путь (ключи и индексы) с шагами выражения"""
+    while i < len(steps):
+        kind, value = steps[i]
+        if kind == "deep":
+            # ..name: имя на любой глубине ниже текущей
+            for k in range(j, len(path)):
+                if (value is None or path[k] == value) and _json_path_matches(steps, path, i + 1, k + 1):
+                    return True
+            return False
+        if j >= len(path):
+            return False
+        part = path[j]
+        if kind == "key" and part != value:
+            return False
+        if kind == "index" and (isinstance(part, str) or part != value):
+            return False
+        i += 1
+        j += 1
+    return j == len(path)
+
+def _json_key(token):
+    """Ключ из исходного токена строки"""
+    return token[1:-1] if '\\' not in token else json.loads(token)
+
+def iter_json_path(stream, expression):
+    """Значения по пути из потока JSON.
+
+    В память попадают только совпавшие поддеревья; совпадения внутри уже
+    найденного значения отдельно не выдаются.
+    """
+    steps = parse_json_path(expression)
+    path = []
+    arrays = []
+    builder = None
+    keys = []
+
+    for event, token in JsonEventReader(stream):
+        if builder is not None:
+            # Собираем найденный контейнер в объект Python
+            if event == "key":
+                keys[-1] = _json_key(token)
+                continue
+            if event == "end_map" or event == "end_array":
+                value = builder.pop()
+                keys.pop()
+                if builder:
+                    continue
+                builder = None
+                yield value
+                if arrays and arrays[-1]:
+                    path[-1] += 1
+                continue
+            if event == "value":
+                value = json.loads(token)
+            else:
+                value = {} if event == "start_map" else []
+            parent = builder[-1]
+            if isinstance(parent, list):
+                parent.append(value)
+            else:
+                parent[keys[-1]] = value
+            if event != "value":
+                builder.append(value)
+                keys.append(None)
+            continue
+
+        if event == "key":
+            path[-1] = _json_key(token)
+            continue
+        if event == "end_map" or event == "end_array":
+            path.pop()
+            arrays.pop()
+            if arrays and arrays[-1]:
+                path[-1] += 1
+            continue
+
+        if _json_path_matches(steps, path):
+            if event == "value":
+                yield json.loads(token)
+            else:
+                builder = [{} if event == "start_map" else []]
+                keys = [None]
+                continue
+        if event == "start_map":
+            path.append(None)
+            arrays.append(False)
+        elif event == "start_array":
+            path.append(0)
+            arrays.append(True)
+        elif arrays and arrays[-1]:
+            path[-1] += 1
+
+def _json_token_type(token):
+    """Тип скалярного значения по исходному токену"""
+    first = token[0]
+    if first == '"':
+        return "str"
+    if first == 't' or first == 'f':
+        return "bool"
+    if first == 'n':
+        return "null"
+    if first == 'N' or token[-1] == 'y' or '.' in token or 'e' in token or 'E' in token:
+        return "float"
+    return "int"
+
+def _json_child_path(prefix, key):
+    """Путь дочернего ключа в записи $.a.b или $['a b']"""
+    if key.isidentifier():
+        return f"{prefix}.{key}"
+    return f"{prefix}[{json.dumps(key, ensure_ascii=False)}]"
+
+def json_summary(stream, max_paths=JSON_SUMMARY_MAX_PATHS):
+    """Структурная сводка без построения дерева.
+
+    Индексы массивов сворачиваются в [*], поэтому $.items[*].id считается
+    один раз на все элементы. Возвращает словарь: paths ({путь: Counter
+    типов}), types (Counter по всему документу), max_depth, keys (число
+    ключей), values (число значений) и truncated (пути сверх max_paths).
+    """
+    paths = {}
+    types = {}
+    prefixes = []
+    slots = ["$"]
+    depth = max_depth = keys = values = truncated = 0
+
+    for event, token in JsonEventReader(stream):
+        if event == "key":
+            keys += 1
+            slots[-1] = _json_child_path(prefixes[-1], _json_key(token))
+            continue
+        if event == "end_map" or event == "end_array":
+            prefixes.pop()
+            slots.pop()
+            depth -= 1
+            continue
+
+        kind = "dict" if event == "start_map" else "list" if event == "start_array" else _json_token_type(token)
+        values += 1
+        types[kind] = types.get(kind, 0) + 1
+        counter = paths.get(slots[-1])
+        if counter is None:
+            if len(paths) < max_paths:
+                counter = paths[slots[-1]] = {}
+            else:
+                truncated += 1
+        if counter is not None:
+            counter[kind] = counter.get(kind, 0) + 1
+
+        if event != "value":
+            prefixes.append(slots[-1])
+            slots.append(slots[-1] + "[*]" if event == "start_array" else None)
+            depth += 1
+            max_depth = max(max_depth, depth)
+
+    return {"paths": paths, "types": types, "max_depth": max_depth,
+            "keys": keys, "values": values, "truncated": truncated}
+
+def format_type_counts(counts):
+    """dict ×3, str ×10 — по убыванию частоты"""
+    return ", ".join(f"{kind} ×{count:,d}" for kind, count in
+                     sorted(counts.items(), key=lambda item: -item[1]))
+
+def print_json_summary(summary, limit=50):
+    """Вывод сводки структуры JSON"""
+    printc(f"\nЗначений: {summary['values']:,d} | ключей: {summary['keys']:,d} | "
+           f"макс. глубина: {summary['max_depth']}", "header")
+    printc(f"Типы: {format_type_counts(summary['types'])}", "text")
+    printc("\nПути:", "header")
+    paths = list(summary["paths"].items())
+    width = min(60, max((len(path) for path, _ in paths[:limit]), default=1))
+    for path, counts in paths[:limit]:
+        printc(f"  {path:<{width}}  {format_type_counts(counts)}", "accent")
+    if len(paths) > limit:
+        printc(f"  ... и ещё {len(paths) - limit:,d} путей", "text")
+    if summary["truncated"]:
+        printc(f"  Значений вне сводки (превышен лимит путей): {summary['truncated']:,d}", "text")
+
+def json_query_mode():
+    """Запрос по пути или сводка структуры JSON-файла"""
+    path = input(f"{theme['accent']}Путь к файлу: {theme['text']}").strip()
+    if not os.path.isfile(path):
+        printc("Файл не найден!", "error")
+        return
+    expression = input(f"{theme['accent']}Путь, например $.items[*].id (Enter — сводка структуры): {theme['text']}").strip()
+
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if not expression:
+            summary = json_summary(f)
+            print_json_summary(summary)
+            count = summary["values"]
+        else:
+            count = 0
+            for value in iter_json_path(f, expression):
+                count += 1
+                if count <= 20:
+                    printc(f"  {json.dumps(value, ensure_ascii=False)[:200]}", "accent")
+            if count > 20:
+                printc(f"  ... и ещё {count - 20:,d}", "text")
+            printc(f"\nНайдено: {count:,d}", "header")
+    elapsed = time.perf_counter() - start
+
+    size = os.path.getsize(path)
+    printc(f"{format_size(size)} за {elapsed:.2f} с ({format_size(size / max(elapsed, 1e-9))}/s)", "text")
+
 def json_formatter():
     """Форматировщик JSON"""
     print_header("📝 JSON ФОРМАТИРОВЩИК")
@@ -1156,9 +4967,25 @@ def json_formatter():
     printc("1. Форматировать JSON", "text")
     printc("2. Минифицировать JSON", "text")
     printc("3. Проверить JSON", "text")
+    printc("4. Потоковая обработка файла (большой JSON, JSON Lines)", "text")
+    printc("5. Проверить файл или директорию .json", "text")
+    printc("6. Запрос по пути / сводка структуры файла", "text")
     
     choice = input(f"\n{theme['accent']}Выбор: {theme['text']}")
     
+    if choice in ('4', '5', '6'):
+        try:
+            if choice == '4':
+                json_stream_mode()
+            elif choice == '5':
+                json_validate_mode()
+            else:
+                json_query_mode()
+        except (OSError, ValueError) as e:
+            printc(f"\n✗ Ошибка: {e}", "error")
+        wait_for_enter()
+        return
+    
     if choice not in ['1', '2', '3']:
         printc("Неверный выбор!", "error")
         wait_for_enter()
@@ -1183,7 +5010,7 @@ def json_formatter():
         return
     
     try:
-        data = json.loads(json_text)
+        data = parse_json(json_text)
         
         if choice == '1':
             result = json.dumps(data, indent=2, ensure_ascii=False)
@@ -1203,7 +5030,7 @@ def json_formatter():
             if isinstance(data, dict):
                 printc(f"Ключей: {len(data)}", "text")
                 printc("Первые 5 ключей:", "header")
-                for i, key in enumerate(list(data.keys())[:5]):
+                for key, _ in zip(data, range(5)):
                     printc(f"  {key}", "accent")
             elif isinstance(data, list):
                 printc(f"Элементов: {len(data)}", "text")
@@ -1235,6 +5062,8 @@ def settings_menu():
         printc(f"Подсказки: {'ВКЛ' if SETTINGS['show_tips'] else 'ВЫКЛ'}", "text")
         printc(f"Режим разработчика: {'ВКЛ' if SETTINGS['developer_mode'] else 'ВЫКЛ'}", "text")
         printc(f"Логирование: {'ВКЛ' if SETTINGS['log_operations'] else 'ВЫКЛ'}", "text")
+        printc(f"Кэш хешей: {'ВКЛ' if SETTINGS['hash_cache'] else 'ВЫКЛ'}", "text")
+        printc(f"Словари эмодзи: {SETTINGS['emoji_languages']}", "text")
         
         printc("\nВыберите действие:", "header")
         printc("1. Сменить тему оформления", "text")
@@ -1245,6 +5074,9 @@ def settings_menu():
         printc("6. Логирование операций", "text")
         printc("7. Сбросить настройки", "error")
         printc("8. Сохранить и выйти", "success")
+        printc("9. Вкл/Выкл кэш хешей", "text")
+        printc("10. Очистить кэш хешей", "text")
+        printc("11. Словари эмодзи", "text")
         printc("q. Выход без сохранения", "text")
         
         choice = input(f"\n{theme['accent']}Выбор: {theme['text']}").lower()
@@ -1302,8 +5134,569 @@ def settings_menu():
             clear_screen()
             return
         
+        elif choice == '9':
+            SETTINGS["hash_cache"] = not SETTINGS["hash_cache"]
+            printc(f"Кэш хешей: {'ВКЛ' if SETTINGS['hash_cache'] else 'ВЫКЛ'}", "success")
+        
+        elif choice == '10':
+            if os.path.exists(HASH_CACHE_FILE):
+                cache = _hash_cache or HashCache(HASH_CACHE_FILE)
+                cache.clear()
+            printc("✓ Кэш хешей очищен", "success")
+        
+        elif choice == '11':
+            printc(f"\nДоступные словари: {', '.join(emoji_languages())}", "header")
+            printc(f"(файлы .json, .tsv, .xml CLDR в папке {EMOJI_DICT_DIR}, имя файла — код языка)", "text")
+            languages = input(f"{theme['accent']}Языки через запятую: {theme['text']}").strip()
+            try:
+                SETTINGS["emoji_languages"] = ",".join(parse_emoji_languages(languages))
+                printc(f"✓ Словари эмодзи: {SETTINGS['emoji_languages']}", "success")
+            except ValueError as e:
+                printc(str(e), "error")
+        
         time.sleep(0.5)
 
+# ==================== КОМАНДНАЯ СТРОКА ====================
+
+class CLIError(Exception):
+    """Ошибка пакетного режима: сообщение в stderr, код возврата 1"""
+
+def read_cli_text(args):
+    """Текст из аргумента, файла (-f) или stdin"""
+    if getattr(args, 'text', None) is not None:
+        return args.text
+    if getattr(args, 'file', None):
+        with open(args.file, 'r', encoding='utf-8') as f:
+            return f.read()
+    return sys.stdin.read()
+
+def cli_hash(args):
+    """edge_utility.py hash"""
+    if args.bulk:
+        return cli_hash_bulk(args)
+
+    algorithms = parse_algorithms(args.algorithms or "all")
+    if args.text is not None:
+        digests = {name: HASH_ALGORITHMS[name](args.text.encode()).hexdigest() for name in algorithms}
+    elif args.file:
+        digests = hash_file(args.file, algorithms)
+    else:
+        digests = hash_stream(sys.stdin.buffer, algorithms)
+
+    if len(digests) == 1:
+        print(next(iter(digests.values())))
+    else:
+        for name, digest in digests.items():
+            print(f"{name}: {digest}")
+    return 0
+
+def cli_hash_bulk(args):
+    """edge_utility.py hash --bulk: каждая строка входа — отдельная запись"""
+    algorithms = parse_algorithms(args.algorithms or "", ("SHA-256",))
+    src = open(args.file, 'rb') if args.file else sys.stdin.buffer
+    dst = open(args.output, 'w', encoding='utf-8', newline='\n') if args.output else sys.stdout
+    try:
+        records, nbytes, elapsed = hash_bulk(src, dst, algorithms, args.format, args.workers)
+    finally:
+        if args.file:
+            src.close()
+        if args.output:
+            dst.close()
+    if args.stats:
+        print(format_throughput(records, nbytes, elapsed), file=sys.stderr)
+    return 0
+
+def cli_base64(args):
+    """edge_utility.py base64: потоково из аргумента, файла или stdin"""
+    if args.text is not None:
+        src = io.BytesIO(args.text.encode())
+    else:
+        src = open(args.file, 'rb') if args.file else sys.stdin.buffer
+    dst = open(args.output, 'wb') if args.output else sys.stdout.buffer
+
+    try:
+        if args.action == 'encode':
+            base64_encode_stream(src, dst, args.variant)
+            if not args.output and args.variant != "mime":
+                dst.write(b"\n")
+        else:
+            base64_decode_stream(src, dst, args.variant)
+    finally:
+        if args.file:
+            src.close()
+        if args.output:
+            dst.close()
+        else:
+            dst.flush()
+    return 0
+
+def cli_url(args):
+    """edge_utility.py url: без текста обрабатывает вход построчно пакетами"""
+    action = {"encode": "quote", "decode": "unquote"}.get(args.action, args.action)
+    if args.text is not None:
+        sys.stdout.write(url_records([args.text.encode()], action, args.safe)[0])
+        return 0
+    src = open(args.file, 'rb') if args.file else sys.stdin.buffer
+    dst = open(args.output, 'w', encoding='utf-8', newline='\n') if args.output else sys.stdout
+    try:
+        records, nbytes, elapsed = url_bulk(src, dst, action, args.safe, args.workers)
+    finally:
+        if args.file:
+            src.close()
+        if args.output:
+            dst.close()
+    if args.stats:
+        print(format_throughput(records, nbytes, elapsed), file=sys.stderr)
+    return 0
+
+def cli_json(args):
+    """edge_utility.py json"""
+    if args.dir:
+        return cli_json_validate_tree(args)
+    if args.action in ('query', 'summary'):
+        return cli_json_query(args)
+    if args.stream or args.lines:
+        return cli_json_stream(args)
+
+    if args.action == 'validate' and args.file:
+        result = validate_json_file(args.file)
+        if not result["valid"]:
+            raise CLIError("строка {}, столбец {}: {}".format(*result["error"]))
+        print(f"OK {result['root']}")
+        return 0
+
+    text = read_cli_text(args)
+    try:
+        data = parse_json(text)
+    except json.JSONDecodeError as e:
+        raise CLIError(f"строка {e.lineno}, столбец {e.colno}: {e.msg}")
+
+    if args.action == 'format':
+        print(json.dumps(data, indent=args.indent, ensure_ascii=False))
+    elif args.action == 'minify':
+        print(json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+    else:
+        print(f"OK {type(data).__name__}")
+    return 0
+
+def cli_json_validate_tree(args):
+    """edge_utility.py json validate --dir: параллельная проверка директории"""
+    results = validate_json_tree(args.dir, workers=args.workers)
+    invalid = 0
+    for result in results:
+        if not result["valid"]:
+            invalid += 1
+            lineno, colno, msg = result["error"]
+            print(f"{result['path']}:{lineno}:{colno}: {msg}")
+    print(f"OK {len(results) - invalid}, ERRORS {invalid}", file=sys.stderr)
+    return 1 if invalid else 0
+
+def cli_json_query(args):
+    """edge_utility.py json query/summary: по событиям, без построения дерева"""
+    if args.action == 'query' and not args.path:
+        raise CLIError("для query нужен --path, например '$.items[*].id'")
+    src = open(args.file, 'r', encoding='utf-8-sig') if args.file else sys.stdin
+    dst = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.action == 'query':
+            for value in iter_json_path(src, args.path):
+                dst.write(json.dumps(value, ensure_ascii=False) + "\n")
+        else:
+            json.dump(json_summary(src), dst, ensure_ascii=False, indent=args.indent)
+            dst.write("\n")
+    except JsonStreamError as e:
+        raise CLIError(f"строка {e.lineno}, столбец {e.colno}: {e.msg}")
+    except ValueError as e:
+        raise CLIError(str(e))
+    finally:
+        if args.file:
+            src.close()
+        if args.output:
+            dst.close()
+    return 0
+
+def cli_json_stream(args):
+    """edge_utility.py json --stream/--lines: память не зависит от размера документа"""
+    src = open(args.file, 'r', encoding='utf-8') if args.file else sys.stdin
+    dst = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.lines:
+            count = write_json_lines(src, io.StringIO() if args.action == 'validate' else dst,
+                                     indent=args.indent, minify=args.action != 'format')
+        elif args.action == 'validate':
+            count = sum(1 for _ in JsonEventReader(src))
+        else:
+            count = write_json_stream(src, dst, indent=args.indent, minify=args.action == 'minify')
+    except JsonStreamError as e:
+        raise CLIError(f"строка {e.lineno}, столбец {e.colno}: {e.msg}")
+    finally:
+        if args.file:
+            src.close()
+        if args.output:
+            dst.close()
+    if args.action == 'validate':
+        print(f"OK {count}")
+    return 0
+
+def cli_text(args):
+    """edge_utility.py text: статистика в JSON; -f DIR или шаблон — корпус по процессам"""
+    if args.text is not None:
+        stats = TextStats(args.ngram)
+        stats.update(args.text)
+    elif args.file and is_corpus_pattern(args.file):
+        files = corpus_files(args.file)
+        if not files:
+            raise CLIError(f"файлы не найдены: {args.file}")
+        stats = analyze_corpus(files, workers=args.workers)
+    elif args.file:
+        with open(args.file, 'r', encoding='utf-8', errors='replace') as f:
+            stats = analyze_text_stream(f, args.ngram)
+    else:
+        stats = analyze_text_stream(sys.stdin, args.ngram)
+    json.dump(stats.summary(args.top), sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+def cli_emoji(args):
+    """edge_utility.py emoji: построчно, большие файлы не читаются целиком"""
+    try:
+        matcher = get_emoji_matcher(args.lang)
+    except ValueError as e:
+        raise CLIError(str(e))
+    dst = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.text is not None:
+            dst.write(emojify(args.text, matcher)[0] + "\n")
+        elif args.file:
+            with open(args.file, 'r', encoding='utf-8', errors='replace') as src:
+                emojify_stream(src, dst, matcher)
+        else:
+            emojify_stream(sys.stdin, dst, matcher)
+    finally:
+        if args.output:
+            dst.close()
+    return 0
+
+def cli_qr(args):
+    """edge_utility.py qr"""
+    if args.batch:
+        try:
+            count, nbytes, errors = qr_batch(args.batch, args.dir, args.format, args.name, args.column,
+                                             args.level, workers=args.workers)
+        except ValueError as e:
+            raise CLIError(str(e))
+        for n, error in errors:
+            print(f"{n}: {error}", file=sys.stderr)
+        return 1 if errors else 0
+
+    text = read_cli_text(args).rstrip('\r\n')
+    if not text:
+        raise CLIError("пустые данные для QR-кода")
+    matrix = qr_matrix(text, args.level)
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(qr_png_bytes(matrix))
+    else:
+        print(render_qr_halfblock(matrix))
+    return 0
+
+def cli_fileinfo(args):
+    """edge_utility.py fileinfo: файл — метаданные и хеши, директория — манифест"""
+    path = args.path
+    if not os.path.exists(path):
+        raise CLIError(f"файл не найден: {path}")
+
+    cache = None if args.no_cache else get_hash_cache()
+
+    if os.path.isdir(path):
+        if args.verify:
+            try:
+                algorithm, report = verify_directory(path, args.verify)
+            except ValueError as e:
+                raise CLIError(f"некорректный манифест {args.verify}: {e}")
+            for key in ("failed", "missing", "new", "errors"):
+                for item in report[key]:
+                    print(f"{key.upper()}: {item}")
+            print(f"OK: {len(report['ok'])}")
+            return 1 if report["failed"] or report["missing"] or report["errors"] else 0
+
+        algorithm = parse_algorithms(args.algorithms, ("SHA-256",))[0]
+        entries = hash_directory(path, algorithm, exclude=(args.manifest,) if args.manifest else (),
+                                 cache=cache)
+        if args.manifest:
+            write_manifest(args.manifest, entries, algorithm)
+        else:
+            for rel, _, digest, _ in entries:
+                if digest:
+                    print(f"{digest}  {rel}")
+        for rel, _, _, error in entries:
+            if error:
+                print(f"{rel}: {error}", file=sys.stderr)
+        return 1 if any(error for *_, error in entries) else 0
+
+    if args.tree:
+        if args.segment_mb < 1:
+            raise CLIError("--segment-mb должен быть не меньше 1")
+        segment_size = args.segment_mb * 1024 * 1024
+        tree = tree_hash_file(path, segment_size=segment_size, resume=not args.no_resume,
+                              workers=args.workers)
+        print(f"{tree_hash_name(segment_size=segment_size)}: {tree['root']}")
+        if args.save_map:
+            save_tree_map(args.save_map, tree)
+        if args.compare:
+            ranges = diff_trees(tree, load_tree(args.compare, segment_size=segment_size, workers=args.workers))
+            for begin, end in ranges:
+                print(f"DIFF: {begin}-{end}")
+            return 1 if ranges else 0
+        return 0
+
+    stats = os.stat(path)
+    counter = TextCounter()
+    digests = cached_hash_file(path, parse_algorithms(args.algorithms), cache=cache, counter=counter)
+
+    print(f"path: {os.path.abspath(path)}")
+    print(f"size: {stats.st_size}")
+    print(f"modified: {datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"mode: {stat.filemode(stats.st_mode)}")
+    for name, digest in digests.items():
+        print(f"{name}: {digest}")
+    for name, value in counter.result().items():
+        print(f"{name}: {value}")
+    return 0
+
+def cli_password(args):
+    """edge_utility.py password: пароли и токены пакетами"""
+    chars = args.chars or PASSWORD_CHARSETS[args.charset]
+    dst = open(args.output, 'w', encoding='utf-8', newline='\n') if args.output else sys.stdout
+    try:
+        nbytes, elapsed = write_secrets(dst, args.kind, args.count, args.length, chars)
+    except ValueError as e:
+        raise CLIError(str(e))
+    finally:
+        if args.output:
+            dst.close()
+    if args.stats:
+        print(format_throughput(args.count, nbytes, elapsed), file=sys.stderr)
+    return 0
+
+def cli_metrics(args):
+    """edge_utility.py metrics: сэмплер метрик до --duration или Ctrl+C, экспорт окна"""
+    try:
+        import psutil
+    except ImportError:
+        raise CLIError("нужен psutil: pip install psutil")
+    if args.interval <= 0 or args.window < 1 or args.flush <= 0:
+        raise CLIError("интервал, окно и --flush должны быть положительными")
+    if args.top < 0:
+        raise CLIError("--top не может быть отрицательным")
+
+    sampler = MetricsSampler(psutil, args.interval, args.window, args.top)
+    sampler.start()
+    stop_at = time.monotonic() + args.duration if args.duration else None
+    try:
+        while stop_at is None or time.monotonic() < stop_at:
+            wait = args.flush if args.output else 3600
+            if stop_at is not None:
+                wait = min(wait, stop_at - time.monotonic())
+            time.sleep(max(0.0, wait))
+            if args.output:
+                export_metrics(sampler.snapshot(), args.output, args.format)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.stop()
+
+    if args.output:
+        export_metrics(sampler.snapshot(), args.output, args.format)
+    else:
+        METRICS_WRITERS[args.format](sampler.snapshot(), sys.stdout)
+    if args.stats:
+        print(f"тиков: {len(sampler.times.values())}, затраты сэмплера: {sampler.overhead():.2f}% CPU",
+              file=sys.stderr)
+    return 0
+
+def cli_speedtest(args):
+    """edge_utility.py speedtest: многопоточный тест скорости или локальный сервер (--serve)"""
+    if args.serve is not None:
+        server, base_url = start_speed_server(args.host, args.serve)
+        print(f"Сервер теста скорости: {base_url}/download, {base_url}/upload (Ctrl+C — стоп)", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    server = None
+    url, upload_url = args.url or SPEED_SERVERS[0]["url"], args.upload_url
+    if args.local:
+        server, base_url = start_speed_server()
+        url, upload_url = f"{base_url}/download", f"{base_url}/upload"
+    try:
+        for direction, target in (("download", url), ("upload", upload_url)):
+            if not target:
+                continue
+            result = speed_test(target, direction, args.streams, args.duration, args.warmup)
+            print(f"{direction}: {result['mean'] * 8 / 1e6:.1f} Mbit/s "
+                  f"({result['bytes']} bytes in {result['elapsed']:.2f} s, {result['streams']} streams)")
+            print(" ".join(f"p{q}={value * 8 / 1e6:.1f}" for q, value in result["percentiles"].items()))
+            for error in result["errors"]:
+                print(f"{direction}: {error}", file=sys.stderr)
+    except ImportError:
+        raise CLIError("нужен requests: pip install requests")
+    except (RuntimeError, OSError) as e:
+        raise CLIError(str(e))
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+    return 0
+
+def build_cli_parser():
+    """Парсер подкоманд пакетного режима"""
+    parser = argparse.ArgumentParser(
+        prog="edge_utility.py",
+        description="Edge Utility Pro — пакетный режим (без аргументов запускается меню)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_input(command, text=True):
+        if text:
+            command.add_argument("text", nargs="?", help="входные данные (по умолчанию stdin)")
+        command.add_argument("-f", "--file", help="читать входные данные из файла")
+
+    command = commands.add_parser("hash", help="хеши текста, файла или stdin")
+    add_input(command)
+    command.add_argument("-a", "--algorithms",
+                         help="алгоритмы через запятую или all (по умолчанию all, для --bulk SHA-256)")
+    command.add_argument("--bulk", action="store_true", help="хешировать каждую строку входа отдельно")
+    command.add_argument("--format", choices=("tsv", "jsonl"), default="tsv", help="формат вывода --bulk")
+    command.add_argument("-o", "--output", help="--bulk: записать результат в файл")
+    command.add_argument("--workers", type=int, help="--bulk: число потоков (по умолчанию авто)")
+    command.add_argument("--stats", action="store_true", help="итог и скорость в stderr")
+    command.set_defaults(handler=cli_hash)
+
+    command = commands.add_parser("base64", help="Base64 кодирование/декодирование")
+    command.add_argument("action", choices=("encode", "decode"))
+    add_input(command)
+    command.add_argument("--variant", choices=BASE64_VARIANTS, default="standard")
+    command.add_argument("-o", "--output", help="записать результат в файл")
+    command.set_defaults(handler=cli_base64)
+
+    command = commands.add_parser("url", help="URL quote/unquote и разбор (stdin построчно)")
+    command.add_argument("action", choices=("encode", "decode") + URL_ACTIONS,
+                         help="encode = quote, decode = unquote; parse — поля URL в JSON Lines")
+    add_input(command)
+    command.add_argument("--safe", help="quote/quote_plus: символы, которые не кодируются")
+    command.add_argument("-o", "--output", help="записать результат в файл")
+    command.add_argument("--workers", type=int, help="число процессов (по умолчанию авто)")
+    command.add_argument("--stats", action="store_true", help="итог и скорость в stderr")
+    command.set_defaults(handler=cli_url)
+
+    command = commands.add_parser("json", help="форматирование, минификация и проверка JSON")
+    command.add_argument("action", choices=("format", "minify", "validate", "query", "summary"))
+    add_input(command, text=False)
+    command.add_argument("--indent", type=int, default=2)
+    command.add_argument("--stream", action="store_true", help="потоковая обработка большого документа")
+    command.add_argument("--lines", action="store_true", help="JSON Lines: по записи на строку")
+    command.add_argument("-o", "--output", help="--stream/--lines/query/summary: записать результат в файл")
+    command.add_argument("--path", help="query: выражение пути, например '$.items[*].id'")
+    command.add_argument("--dir", help="validate: проверить все .json в директории параллельно")
+    command.add_argument("--workers", type=int, help="--dir: число процессов")
+    command.set_defaults(handler=cli_json, text=None)
+
+    command = commands.add_parser("text", help="анализ текста: символы, слова, n-граммы, алфавиты")
+    add_input(command)
+    command.add_argument("--top", type=int, default=10, help="размер топов")
+    command.add_argument("--ngram", type=int, default=2, help="длина n-грамм слов (1 — не считать)")
+    command.add_argument("--workers", type=int, help="корпус (-f директория или шаблон): число процессов")
+    command.set_defaults(handler=cli_text)
+
+    command = commands.add_parser("emoji", help="замена слов и фраз на эмодзи")
+    add_input(command)
+    command.add_argument("-o", "--output", help="записать результат в файл")
+    command.add_argument("--lang", help=f"словари через запятую (ru и файлы из {EMOJI_DICT_DIR}/)")
+    command.set_defaults(handler=cli_emoji)
+
+    command = commands.add_parser("qr", help="QR-код в терминал или PNG")
+    add_input(command)
+    command.add_argument("-o", "--output", help="сохранить PNG")
+    command.add_argument("--level", choices=tuple(QR_ERROR_LEVELS), default="L", help="уровень коррекции ошибок")
+    command.add_argument("--batch", metavar="FILE", help="пакет: файл строк или CSV, по коду на запись")
+    command.add_argument("-d", "--dir", default="qr_codes", help="--batch: папка для файлов")
+    command.add_argument("--format", choices=("png", "svg"), default="png", help="--batch: формат файлов")
+    command.add_argument("--name", default=QR_BATCH_TEMPLATE,
+                         help="--batch: шаблон имени, поля {n}, {data} и колонки CSV")
+    command.add_argument("--column", help="--batch: колонка CSV с данными (по умолчанию первая)")
+    command.add_argument("--workers", type=int, help="--batch: число процессов")
+    command.set_defaults(handler=cli_qr)
+
+    command = commands.add_parser("fileinfo", help="метаданные и хеши файла, манифест директории")
+    command.add_argument("path")
+    command.add_argument("-a", "--algorithms", default="", help="алгоритмы (по умолчанию MD5, SHA-256)")
+    command.add_argument("--manifest", help="директория: записать манифест (.json/.csv/sha256sum)")
+    command.add_argument("--verify", metavar="MANIFEST", help="директория: проверить по манифесту")
+    command.add_argument("--no-cache", action="store_true", help="не использовать кэш хешей")
+    command.add_argument("--tree", action="store_true",
+                         help=f"возобновляемое дерево хешей ({TREE_ALGORITHM}), Ctrl+C сохраняет прогресс")
+    command.add_argument("--segment-mb", type=int, default=TREE_SEGMENT_SIZE // (1024 * 1024),
+                         help="--tree: размер сегмента в MB")
+    command.add_argument("--no-resume", action="store_true", help="--tree: игнорировать контрольную точку")
+    command.add_argument("--workers", type=int, help="--tree: число процессов (по умолчанию все ядра)")
+    command.add_argument("--save-map", metavar="JSON", help="--tree: сохранить хеши сегментов")
+    command.add_argument("--compare", metavar="FILE_OR_JSON",
+                         help="--tree: сравнить с файлом или картой, вывести различающиеся области")
+    command.set_defaults(handler=cli_fileinfo)
+
+    command = commands.add_parser("password", help="генерация паролей и токенов")
+    command.add_argument("-l", "--length", type=int,
+                         help=f"символов пароля (16) или байт токена hex/urlsafe ({TOKEN_BYTES})")
+    command.add_argument("-n", "--count", type=int, default=1)
+    command.add_argument("-c", "--charset", choices=tuple(PASSWORD_CHARSETS), default="alnum")
+    command.add_argument("--chars", help="произвольный набор символов")
+    command.add_argument("-k", "--kind", choices=SECRET_KINDS, default="password", help="пароль, токен или UUID")
+    command.add_argument("-o", "--output", help="записать результат в файл")
+    command.add_argument("--stats", action="store_true", help="итог и скорость в stderr")
+    command.set_defaults(handler=cli_password)
+
+    command = commands.add_parser("metrics", help="сэмплер метрик системы с экспортом в CSV/Prometheus")
+    command.add_argument("--interval", type=float, default=METRICS_INTERVAL, help="секунд между тиками")
+    command.add_argument("--window", type=int, default=METRICS_WINDOW, help="тиков в истории")
+    command.add_argument("--top", type=int, default=METRICS_TOP, help="процессов в топе (0 — не собирать)")
+    command.add_argument("--duration", type=float, help="секунд работы (по умолчанию до Ctrl+C)")
+    command.add_argument("--format", choices=tuple(METRICS_WRITERS), default="prom")
+    command.add_argument("-o", "--output", help="файл экспорта, перезаписывается атомарно каждые --flush с")
+    command.add_argument("--flush", type=float, default=METRICS_FLUSH, help="-o: период перезаписи, с")
+    command.add_argument("--stats", action="store_true", help="число тиков и затраты сэмплера в stderr")
+    command.set_defaults(handler=cli_metrics)
+
+    command = commands.add_parser("speedtest", help="многопоточный тест скорости загрузки и выгрузки")
+    command.add_argument("--url", help="URL для загрузки (по умолчанию первый встроенный сервер)")
+    command.add_argument("--upload-url", help="URL для выгрузки POST")
+    command.add_argument("--local", action="store_true", help="тест против встроенного локального сервера")
+    command.add_argument("--serve", type=int, metavar="PORT", help="только запустить сервер теста на порту")
+    command.add_argument("--host", default="127.0.0.1", help="--serve: адрес (0.0.0.0 — все интерфейсы)")
+    command.add_argument("-n", "--streams", type=int, default=SPEED_STREAMS, help="параллельных соединений")
+    command.add_argument("--duration", type=float, default=SPEED_DURATION, help="секунд на направление")
+    command.add_argument("--warmup", type=float, default=SPEED_WARMUP, help="секунд прогрева (не учитываются)")
+    command.set_defaults(handler=cli_speedtest)
+
+    return parser
+
+def run_cli(argv=None):
+    """Пакетный режим: без логотипа, меню и ожидания Enter. Возвращает код выхода"""
+    args = build_cli_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # Получатель закрыл канал (например, head): выходим без сообщения
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (CLIError, ValueError, OSError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
 # ==================== ГЛАВНОЕ МЕНЮ ====================
 
 def show_menu():
@@ -1459,6 +5852,8 @@ def main():
             time.sleep(1)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli())
     try:
         main()
     except KeyboardInterrupt: